@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+import django
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "crm.admission.AdmissionControlMiddleware",
 ]
 
 ROOT_URLCONF = "alx_backend_graphql.urls"
@@ -66,13 +70,53 @@ WSGI_APPLICATION = "alx_backend_graphql.wsgi.application"
 
 
 # Database
+# CRM_DB_PROFILE=sqlite-production enables WAL + tuned pragmas, persistent
+# connections and a read alias for GraphQL queries (see crm/db.py).
+DB_PROFILE = os.environ.get("CRM_DB_PROFILE", "default")
+DB_NAME = os.environ.get("CRM_DB_NAME", BASE_DIR / "db.sqlite3")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": DB_NAME,
     }
 }
 
+if DB_PROFILE == "sqlite-production":
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # KiB, i.e. 64 MB per connection
+        "mmap_size": 268435456,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    }
+    _sqlite_options = {"timeout": 5}
+    if django.VERSION >= (5, 1):
+        # Take the write lock up front instead of failing on lock upgrade.
+        _sqlite_options["transaction_mode"] = "IMMEDIATE"
+
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": DB_NAME,
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": _sqlite_options,
+            "PRAGMAS": SQLITE_PRAGMAS,
+        },
+        "read": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": DB_NAME,
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"timeout": 5},
+            "PRAGMAS": {**SQLITE_PRAGMAS, "query_only": 1},
+            "TEST": {"MIRROR": "default"},
+        },
+    }
+    DATABASE_ROUTERS = ["crm.db.ReadWriteRouter"]
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -106,6 +150,48 @@ GRAPHENE = {
     "SCHEMA": "graphql_crm.schema.schema",
 }
 
+# Per-process concurrency limits for /graphql (see crm/admission.py)
+GRAPHQL_ADMISSION = {
+    "MAX_CONCURRENT": 16,
+    "MUTATION_RESERVED": 4,
+    "MAX_HEAVY": 4,
+    "MAX_PER_CLIENT": 4,
+    "HEAVY_COST": 50,
+    "QUEUE_SIZE": 32,
+    "QUEUE_TIMEOUT": 0.5,
+    "RETRY_AFTER": 1,
+}
+
+# Orders older than this are moved to the archive tables (crm/archive.py)
+ORDER_ARCHIVE_AFTER_DAYS = 365
+
+# Shared cache: catalog version key (crm/catalog.py) and cached counts (crm/counts.py).
+# Without CRM_CACHE_URL each process has its own cache, so catalog invalidation
+# only reaches the process that made the change (others see it after
+# PRODUCT_CACHE_TTL); set it when running several workers.
+CACHE_URL = os.environ.get("CRM_CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+
+# Max product snapshots held per process by the catalog cache, and how long
+# (seconds) each may be served before it is re-read from the DB
+PRODUCT_CACHE_MAX_ENTRIES = 10000
+PRODUCT_CACHE_TTL = 30
+
+# Jobs run by the resident scheduler (`manage.py run_scheduler`, crm/scheduler.py)
+SCHEDULER_JOBS = {
+    "heartbeat": {"task": "crm.cron.log_crm_heartbeat", "schedule": "*/5 * * * *"},
+    "low-stock": {"task": "crm.cron.update_low_stock", "schedule": "0 */12 * * *"},
+    "order-reminders": {"task": "crm.cron.send_order_reminders", "schedule": "0 8 * * *"},
+    "customer-cleanup": {"task": "crm.cron.clean_inactive_customers", "schedule": "0 2 * * 0"},
+    "crm-report": {"task": "crm.tasks.generate_crm_report", "schedule": "0 6 * * 1"},
+}
+
 
 CRONJOBS = [
     ('*/5 * * * *', 'crm.cron.log_crm_heartbeat'),
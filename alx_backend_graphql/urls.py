@@ -1,10 +1,14 @@
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from crm.views import CRMGraphQLView, admission_stats_view, change_feed_view, export_view, health_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql", csrf_exempt(CRMGraphQLView.as_view(graphiql=True))),
+    path("graphql/admission", admission_stats_view),
+    path("export/<str:entity>", export_view),
+    path("changes", change_feed_view),
+    path("health", health_view),
 ]
-
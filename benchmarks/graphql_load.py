@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Open-loop HTTP load test for /graphql with a mix of the operations clients send.
+
+By default a fresh SQLite dataset is generated in a temporary directory and a
+local server is started against it:
+- wsgi: `manage.py runserver` (threaded, no autoreload);
+- asgi: uvicorn or daphne serving alx_backend_graphql.asgi, whichever is installed.
+Use --url to drive a server that is already running (no seeding).
+
+Requests arrive as a Poisson process at --rate per second, independent of how
+fast the server answers (open loop), and are sent over a pool of --clients
+keep-alive connections, each with its own X-Client-Id. Latency is measured
+from the scheduled arrival time, so time spent waiting for a free connection
+counts. Responses are classified as ok, GraphQL/HTTP error, 429 rejection
+(admission control), "database is locked" timeout or transport failure.
+
+    python benchmarks/graphql_load.py --server wsgi --rate 40 --duration 30 --clients 32
+    python benchmarks/graphql_load.py --server asgi --mix allOrders=6,createOrder=3,bulkCreateCustomers=1
+    python benchmarks/graphql_load.py --url http://127.0.0.1:8000/graphql --json --output load.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from sqlite_rw_bench import PROJECT_ROOT, percentile
+
+DEFAULT_MIX = "allOrders=70,createOrder=20,bulkCreateCustomers=5,updateLowStockProducts=5"
+LOCK_MARKERS = (b"database is locked", b"database table is locked")
+
+
+# -------------------------
+# Operations
+# -------------------------
+ALL_ORDERS = """
+query Orders($first: Int, $gte: Decimal, $since: DateTime) {
+  allOrders(first: $first, totalAmountGte: $gte, orderDateGte: $since) {
+    edges { node { id totalAmount orderDate customer { name email } } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+CREATE_ORDER = """
+mutation CreateOrder($customer: ID!, $products: [ID]!) {
+  createOrder(input: {customerId: $customer, productIds: $products}) {
+    order { id totalAmount }
+  }
+}
+"""
+
+BULK_CREATE_CUSTOMERS = """
+mutation BulkCreateCustomers($input: [CustomerInput]!) {
+  bulkCreateCustomers(input: $input) { customers { id } errors }
+}
+"""
+
+UPDATE_LOW_STOCK = """
+mutation UpdateLowStock {
+  updateLowStockProducts { message products { id stock } }
+}
+"""
+
+
+def all_orders(rng, dataset):
+    since = time.time() - rng.randint(1, 180) * 86400
+    return ALL_ORDERS, "Orders", {
+        "first": rng.choice((10, 20, 50)),
+        "gte": rng.choice((None, 10, 50, 100)),
+        "since": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(since)),
+    }
+
+
+def create_order(rng, dataset):
+    products = rng.sample(range(1, dataset["products"] + 1), rng.randint(1, 3))
+    return CREATE_ORDER, "CreateOrder", {
+        "customer": rng.randint(1, dataset["customers"]),
+        "products": products,
+    }
+
+
+def bulk_create_customers(rng, dataset):
+    batch = []
+    for _ in range(rng.randint(2, 10)):
+        tag = uuid.uuid4().hex[:12]
+        batch.append({"name": f"Load {tag}", "email": f"load-{tag}@example.com", "phone": "+12025550123"})
+    return BULK_CREATE_CUSTOMERS, "BulkCreateCustomers", {"input": batch}
+
+
+def update_low_stock(rng, dataset):
+    return UPDATE_LOW_STOCK, "UpdateLowStock", {}
+
+
+OPERATIONS = {
+    "allOrders": all_orders,
+    "createOrder": create_order,
+    "bulkCreateCustomers": bulk_create_customers,
+    "updateLowStockProducts": update_low_stock,
+}
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}.")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one operation with a positive weight.")
+    return mix
+
+
+# -------------------------
+# Dataset and server
+# -------------------------
+def seed_child(args):
+    """Runs in a subprocess with CRM_DB_NAME pointing at the temporary database."""
+    sys.path.insert(0, PROJECT_ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_backend_graphql.settings")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+    from django.utils import timezone
+
+    from crm.models import Customer, Order, Product
+    from crm.stats import refresh_customer_stats
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(args.seed)
+    now = timezone.now()
+
+    Customer.objects.bulk_create(
+        (Customer(name=f"Customer {i}", email=f"customer{i}@example.com") for i in range(1, args.customers + 1)),
+        batch_size=1000,
+    )
+    Product.objects.bulk_create(
+        (
+            Product(name=f"Product {i}", price=Decimal(rng.randint(100, 20000)) / 100, stock=rng.randint(0, 60))
+            for i in range(1, args.products + 1)
+        ),
+        batch_size=1000,
+    )
+    prices = dict(Product.objects.values_list("pk", "price"))
+    Through = Order.products.through
+    for start in range(0, args.orders, 5000):
+        size = min(5000, args.orders - start)
+        picks = [rng.sample(range(1, args.products + 1), rng.randint(1, 3)) for _ in range(size)]
+        orders = Order.objects.bulk_create(
+            Order(
+                customer_id=rng.randint(1, args.customers),
+                total_amount=sum((prices[p] for p in picked), Decimal("0.00")),
+                order_date=now - timedelta(days=rng.uniform(0, 360)),
+            )
+            for picked in picks
+        )
+        Through.objects.bulk_create(
+            Through(order_id=order.pk, product_id=p) for order, picked in zip(orders, picks) for p in picked
+        )
+    refresh_customer_stats(range(1, args.customers + 1))
+    with connection.cursor() as cursor:
+        # Planner statistics, and the row estimates used by totalCount(mode: APPROXIMATE).
+        cursor.execute("ANALYZE")
+    print(json.dumps({"customers": args.customers, "products": args.products, "orders": args.orders}))
+
+
+def seed(args, env):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--seed-child"] + sys.argv[1:],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(kind, port):
+    if kind == "wsgi":
+        return [sys.executable, "manage.py", "runserver", "--noreload", f"127.0.0.1:{port}"]
+    app = "alx_backend_graphql.asgi:application"
+    if importlib.util.find_spec("uvicorn"):
+        return [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    if importlib.util.find_spec("daphne"):
+        return [sys.executable, "-m", "daphne", "-b", "127.0.0.1", "-p", str(port), app]
+    sys.exit("--server asgi needs uvicorn or daphne: pip install uvicorn")
+
+
+def wait_until_ready(url, proc, log_path, timeout=30.0):
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    body = json.dumps({"query": "{ hello }"}).encode()
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    with open(log_path, errors="replace") as f:
+        tail = f.read()[-2000:]
+    raise SystemExit(f"Server did not become ready:\n{tail}")
+
+
+# -------------------------
+# HTTP client (asyncio, HTTP/1.1 keep-alive)
+# -------------------------
+class Connection:
+    def __init__(self, host, port, client_id):
+        self.host, self.port, self.client_id = host, port, client_id
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def post(self, path, body):
+        if self.writer is None:
+            await self._connect()
+        head = (
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"X-Client-Id: {self.client_id}\r\nConnection: keep-alive\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection.")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            payload = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            payload = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                payload += await self.reader.readexactly(size)
+                await self.reader.readline()
+        else:
+            payload = await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+
+# -------------------------
+# Load generation
+# -------------------------
+def classify(status, payload):
+    if status == 429:
+        return "rejected"
+    if any(marker in payload for marker in LOCK_MARKERS):
+        return "lock_timeout"
+    if status != 200:
+        return "error"
+    try:
+        doc = json.loads(payload)
+    except ValueError:
+        return "error"
+    if doc.get("errors"):
+        return "error"
+    # Mutations that report per-record errors (bulkCreateCustomers) in their payload.
+    for result in (doc.get("data") or {}).values():
+        if isinstance(result, dict) and result.get("errors"):
+            return "error"
+    return "ok"
+
+
+async def run_load(args, url, dataset):
+    parts = urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path or "/"
+    rng = random.Random(args.seed)
+    names, weights = zip(*args.mix.items())
+
+    pool = asyncio.Queue()
+    for n in range(args.clients):
+        pool.put_nowait(Connection(host, port, f"load-{n}"))
+
+    samples = defaultdict(list)  # op -> [(outcome, latency)]
+    tasks = set()
+
+    async def fire(op, scheduled):
+        query, operation_name, variables = OPERATIONS[op](rng, dataset)
+        body = json.dumps({"query": query, "operationName": operation_name, "variables": variables}).encode()
+        conn = await pool.get()
+        try:
+            status, payload = await asyncio.wait_for(conn.post(path, body), args.timeout)
+            outcome = classify(status, payload)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+            conn.close()
+            outcome = "transport_error"
+        finally:
+            pool.put_nowait(conn)
+        samples[op].append((outcome, time.monotonic() - scheduled))
+
+    loop = asyncio.get_running_loop()
+    started = next_at = loop.time()
+    end = started + args.duration
+    while True:
+        next_at += rng.expovariate(args.rate)
+        if next_at >= end:
+            break
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        op = rng.choices(names, weights)[0]
+        task = asyncio.create_task(fire(op, time.monotonic() - max(0.0, loop.time() - next_at)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(set(tasks), timeout=args.timeout + 5)
+    elapsed = loop.time() - started
+    while not pool.empty():
+        pool.get_nowait().close()
+    return samples, elapsed
+
+
+def summarize(results, elapsed):
+    latencies = [lat for _, lat in results]
+    outcomes = defaultdict(int)
+    for outcome, _ in results:
+        outcomes[outcome] += 1
+    sent = len(results)
+    failed = sent - outcomes["ok"]
+    return {
+        "requests": sent,
+        "ok": outcomes["ok"],
+        "throughput_per_s": round(outcomes["ok"] / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "error_rate": round(failed / sent, 4) if sent else 0.0,
+        "errors": outcomes["error"],
+        "rejected_429": outcomes["rejected"],
+        "lock_timeouts": outcomes["lock_timeout"],
+        "transport_errors": outcomes["transport_error"],
+    }
+
+
+def print_summary(report):
+    cfg = report["config"]
+    print(
+        f"{cfg['server']} server, {cfg['rate']:g} req/s for {cfg['duration']:g}s over {cfg['clients']} clients"
+        f" ({report['elapsed_s']}s incl. drain)"
+    )
+    if report.get("dataset"):
+        d = report["dataset"]
+        print(f"dataset: {d['customers']} customers, {d['products']} products, {d['orders']} orders")
+    print(
+        f"{'operation':<24}{'reqs':>7}{'ok/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'err%':>7}{'429':>6}{'locked':>8}{'io':>5}"
+    )
+    for op, s in report["operations"].items():
+        print(
+            f"{op:<24}{s['requests']:>7}{s['throughput_per_s']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}"
+            f"{s['p99_ms']:>10}{s['error_rate'] * 100:>7.1f}{s['rejected_429']:>6}{s['lock_timeouts']:>8}"
+            f"{s['transport_errors']:>5}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--url", help="Target an already running server instead of starting one.")
+    parser.add_argument("--profile", default="default", help="CRM_DB_PROFILE for the started server.")
+    parser.add_argument("--rate", type=float, default=20, help="Mean arrivals per second (Poisson).")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of arrivals.")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent keep-alive connections.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout in seconds.")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of the table.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    parser.add_argument("--seed-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_child:
+        seed_child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = dataset = None
+        url = args.url
+        if url is None:
+            env = dict(
+                os.environ,
+                CRM_DB_PROFILE=args.profile,
+                CRM_DB_NAME=os.path.join(tmp, "load.sqlite3"),
+                PYTHONUNBUFFERED="1",
+            )
+            port = free_port()
+            command = server_command(args.server, port)
+            dataset = seed(args, env)
+            url = f"http://127.0.0.1:{port}/graphql"
+            log_path = os.path.join(tmp, "server.log")
+            log = open(log_path, "w")
+            proc = subprocess.Popen(command, cwd=PROJECT_ROOT, env=env, stdout=log, stderr=log)
+            wait_until_ready(url, proc, log_path)
+        try:
+            samples, elapsed = asyncio.run(run_load(args, url, dataset or {
+                "customers": args.customers, "products": args.products,
+            }))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+                log.close()
+
+    operations = {op: summarize(samples[op], elapsed) for op in args.mix if samples.get(op)}
+    operations["all"] = summarize([s for op in samples for s in samples[op]], elapsed)
+    report = {
+        "config": {
+            "server": "external" if args.url else args.server,
+            "url": url,
+            "profile": None if args.url else args.profile,
+            "rate": args.rate,
+            "duration": args.duration,
+            "clients": args.clients,
+            "mix": args.mix,
+        },
+        "dataset": dataset,
+        "elapsed_s": round(elapsed, 2),
+        "operations": operations,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_summary(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Per-run cost of cron-spawned jobs vs the resident scheduler (crm/scheduler.py).
+
+Both modes run the same jobs against the same temporary SQLite database:
+- cold: every run is a fresh interpreter, as a crontab line starts it
+  (`manage.py run_scheduler --run JOB`, which has the shape of
+  `manage.py crontab run`), plus the `manage.py shell -c` one-liner that
+  clean_inactive_customers.sh runs;
+- resident: one process calls django.setup() once and runs each job --runs
+  times in-process via crm.scheduler.run_job.
+After the first run the jobs find little left to do, so the numbers mostly
+measure per-run overhead, which is what differs between the modes.
+
+    python benchmarks/scheduler_coldstart.py --runs 5
+    python benchmarks/scheduler_coldstart.py --jobs low-stock,order-reminders --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlite_rw_bench import PROJECT_ROOT
+
+DEFAULT_JOBS = "low-stock,order-reminders,customer-cleanup"
+CLEANUP_SHELL = (
+    "from django.utils import timezone; from datetime import timedelta; from django.db.models import Q; "
+    "from crm.models import Customer; cutoff=timezone.now()-timedelta(days=365); "
+    "ids=list(Customer.objects.filter(Q(last_order_date__lt=cutoff) | Q(last_order_date__isnull=True))"
+    ".values_list('id', flat=True)); count=len(ids); Customer.objects.filter(id__in=ids).delete(); print(count)"
+)
+
+
+def django_child():
+    sys.path.insert(0, PROJECT_ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_backend_graphql.settings")
+    import django
+
+    django.setup()
+
+
+def seed_child(args):
+    django_child()
+    import random
+    from datetime import timedelta
+    from decimal import Decimal
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from crm.models import Customer, Order, Product
+    from crm.stats import refresh_customer_stats
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(1)
+    now = timezone.now()
+    Customer.objects.bulk_create(Customer(name=f"C{i}", email=f"c{i}@example.com") for i in range(args.customers))
+    Product.objects.bulk_create(
+        Product(name=f"P{i}", price=Decimal("9.99"), stock=rng.randint(0, 40)) for i in range(200)
+    )
+    Order.objects.bulk_create(
+        (
+            Order(customer_id=rng.randint(1, args.customers), total_amount=Decimal("9.99"),
+                  order_date=now - timedelta(days=rng.uniform(0, 30)))
+            for _ in range(args.orders)
+        ),
+        batch_size=1000,
+    )
+    refresh_customer_stats(range(1, args.customers + 1))
+
+
+def resident_child(args):
+    t0 = time.perf_counter()
+    django_child()
+    from crm.scheduler import get_jobs, keep_connections_warm, run_job
+
+    keep_connections_warm()
+    jobs = get_jobs()
+    startup = time.perf_counter() - t0
+    report = {"startup_ms": round(startup * 1000, 1), "jobs": {}}
+    for name in args.jobs:
+        durations = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            run_job(jobs[name])
+            durations.append(time.perf_counter() - t0)
+        report["jobs"][name] = durations
+    print(json.dumps(report))
+
+
+def timed(cmd, env):
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - t0
+
+
+def stats(durations):
+    return {
+        "runs": len(durations),
+        "mean_ms": round(statistics.mean(durations) * 1000, 1),
+        "p50_ms": round(statistics.median(durations) * 1000, 1),
+        "max_ms": round(max(durations) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", default=DEFAULT_JOBS, type=lambda s: [j for j in s.split(",") if j])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results.")
+    parser.add_argument("--child", choices=("seed", "resident"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "seed":
+        seed_child(args)
+        return
+    if args.child == "resident":
+        resident_child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, CRM_DB_NAME=os.path.join(tmp, "bench.sqlite3"))
+        me = [sys.executable, os.path.abspath(__file__)]
+        subprocess.run(me + ["--child", "seed"] + sys.argv[1:], env=env, check=True, capture_output=True)
+
+        cold = {}
+        for name in args.jobs:
+            cold[name] = [
+                timed([sys.executable, "manage.py", "run_scheduler", "--run", name], env) for _ in range(args.runs)
+            ]
+        if "customer-cleanup" in args.jobs:
+            cold["customer-cleanup (shell -c)"] = [
+                timed([sys.executable, "manage.py", "shell", "-c", CLEANUP_SHELL], env) for _ in range(args.runs)
+            ]
+
+        out = subprocess.run(
+            me + ["--child", "resident"] + sys.argv[1:], env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        resident = json.loads(out.strip().splitlines()[-1])
+
+    report = {
+        "cold": {name: stats(d) for name, d in cold.items()},
+        "resident": {name: stats(d) for name, d in resident["jobs"].items()},
+        "resident_startup_ms": resident["startup_ms"],
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.runs} runs per job; resident process startup (once): {report['resident_startup_ms']}ms")
+    print(f"{'job':<30}{'cold p50 ms':>13}{'resident p50 ms':>17}{'speedup':>9}")
+    for name, c in report["cold"].items():
+        r = report["resident"].get(name.split(" ")[0])
+        if r is None:
+            continue
+        speedup = f"{c['p50_ms'] / r['p50_ms']:.0f}x" if r["p50_ms"] else "-"
+        print(f"{name:<30}{c['p50_ms']:>13}{r['p50_ms']:>17}{speedup:>9}")
+
+
+if __name__ == "__main__":
+    main()
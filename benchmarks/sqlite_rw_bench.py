@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write benchmark: default SQLite settings vs CRM_DB_PROFILE=sqlite-production.
+
+Each profile runs in its own process against a fresh temporary database:
+reader threads page through recent orders as a GraphQL query would, writer
+threads create orders as CreateOrder does. Connections are recycled between
+operations the way Django does between requests (close_old_connections).
+
+    python benchmarks/sqlite_rw_bench.py --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ("default", "sqlite-production")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def summarize(latencies, errors, seconds):
+    return {
+        "ops": len(latencies),
+        "ops_per_s": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+def run_child(args):
+    sys.path.insert(0, PROJECT_ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_backend_graphql.settings")
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import OperationalError, close_old_connections, connections, transaction
+
+    from crm import db
+    from crm.models import Customer, Order, Product
+
+    call_command("migrate", verbosity=0)
+
+    customers = Customer.objects.bulk_create(
+        Customer(name=f"Customer {i}", email=f"c{i}@example.com") for i in range(500)
+    )
+    products = Product.objects.bulk_create(
+        Product(name=f"Product {i}", price=Decimal("9.99"), stock=100) for i in range(50)
+    )
+    orders = Order.objects.bulk_create(
+        (Order(customer=random.choice(customers), total_amount=Decimal("9.99")) for _ in range(args.orders)),
+        batch_size=1000,
+    )
+    Through = Order.products.through
+    Through.objects.bulk_create(
+        (Through(order_id=o.pk, product_id=random.choice(products).pk) for o in orders),
+        batch_size=1000,
+    )
+    connections.close_all()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"read": [], "write": [], "read_errors": 0, "write_errors": 0}
+
+    def reader():
+        local, errors = [], 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with db.operation("query"):
+                    list(
+                        Order.objects.select_related("customer")
+                        .prefetch_related("products")
+                        .order_by("-order_date")[:50]
+                    )
+                local.append(time.perf_counter() - t0)
+            except OperationalError:
+                errors += 1
+            close_old_connections()
+        with lock:
+            results["read"].extend(local)
+            results["read_errors"] += errors
+        connections.close_all()
+
+    def writer():
+        local, errors = [], 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with db.operation("mutation"), transaction.atomic():
+                    picked = random.sample(products, 2)
+                    order = Order.objects.create(
+                        customer=random.choice(customers),
+                        total_amount=sum((p.price for p in picked), Decimal("0.00")),
+                    )
+                    order.products.set(picked)
+                local.append(time.perf_counter() - t0)
+            except OperationalError:
+                errors += 1
+            close_old_connections()
+        with lock:
+            results["write"].extend(local)
+            results["write_errors"] += errors
+        connections.close_all()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(json.dumps({
+        "reads": summarize(results["read"], results["read_errors"], args.seconds),
+        "writes": summarize(results["write"], results["write_errors"], args.seconds),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--orders", type=int, default=20000, help="Orders to seed before measuring.")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    report = {}
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, CRM_DB_PROFILE=profile, CRM_DB_NAME=os.path.join(tmp, "bench.sqlite3"))
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"] + sys.argv[1:],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report[profile] = json.loads(out.strip().splitlines()[-1])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.readers} readers / {args.writers} writers, {args.seconds:g}s, {args.orders} seeded orders")
+    print(f"{'profile':<20}{'kind':<8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for profile, kinds in report.items():
+        for kind, s in kinds.items():
+            print(
+                f"{profile:<20}{kind:<8}{s['ops_per_s']:>10}{s['p50_ms']:>10}"
+                f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Admission control for the GraphQL endpoint.
+
+Each request is classified before it reaches GraphQLView:
+- mutation, or query with an estimated cost (fields + connections);
+- queries at or above HEAVY_COST are "heavy" and have their own, smaller limit.
+
+Limits (per process, see GRAPHQL_ADMISSION in settings):
+- MAX_CONCURRENT in-flight operations, of which MUTATION_RESERVED slots are
+  only usable by mutations;
+- MAX_HEAVY concurrent heavy queries, so cheap queries (e.g. the heartbeat
+  probe) are never starved by dashboards;
+- MAX_PER_CLIENT in-flight operations per client (X-Client-Id header, else IP).
+
+A request that can't start waits in a short bounded queue (QUEUE_SIZE,
+QUEUE_TIMEOUT); otherwise it is rejected with 429 and Retry-After.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.http import JsonResponse
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, OperationType, parse
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "PATH": "/graphql",
+    "MAX_CONCURRENT": 16,
+    "MUTATION_RESERVED": 4,
+    "MAX_HEAVY": 4,
+    "MAX_PER_CLIENT": 4,
+    "HEAVY_COST": 50,
+    "QUEUE_SIZE": 32,
+    "QUEUE_TIMEOUT": 0.5,
+    "RETRY_AFTER": 1,
+}
+
+# Cost model: every selected field costs 1, every connection (allX / edges) adds more.
+FIELD_COST = 1
+CONNECTION_COST = 25
+
+
+def get_config() -> Dict:
+    return {**DEFAULTS, **getattr(settings, "GRAPHQL_ADMISSION", {})}
+
+
+# -------------------------
+# Classification
+# -------------------------
+@dataclass(frozen=True)
+class Operation:
+    kind: str  # "query" | "mutation"
+    cost: int
+
+
+def _selection_cost(selection_set, fragments, seen) -> int:
+    if selection_set is None:
+        return 0
+    cost = 0
+    for node in selection_set.selections:
+        if isinstance(node, FieldNode):
+            cost += FIELD_COST
+            if node.selection_set is not None and (node.name.value.startswith("all") or node.name.value == "edges"):
+                cost += CONNECTION_COST
+            cost += _selection_cost(node.selection_set, fragments, seen)
+        elif isinstance(node, InlineFragmentNode):
+            cost += _selection_cost(node.selection_set, fragments, seen)
+        elif isinstance(node, FragmentSpreadNode):
+            name = node.name.value
+            if name in fragments and name not in seen:
+                cost += _selection_cost(fragments[name].selection_set, fragments, seen | {name})
+    return cost
+
+
+@lru_cache(maxsize=1024)
+def classify(query: str, operation_name: Optional[str] = None) -> Operation:
+    """Clients resend the same documents, so parsing is cached per query text."""
+    try:
+        document = parse(query)
+    except Exception:
+        # GraphQLView will reject it cheaply.
+        return Operation("query", FIELD_COST)
+
+    operations = [d for d in document.definitions if hasattr(d, "operation")]
+    fragments = {d.name.value: d for d in document.definitions if d.kind == "fragment_definition"}
+    op = operations[0] if operations else None
+    if operation_name:
+        op = next((o for o in operations if o.name and o.name.value == operation_name), op)
+    if op is None:
+        return Operation("query", FIELD_COST)
+
+    kind = "mutation" if op.operation == OperationType.MUTATION else "query"
+    return Operation(kind, _selection_cost(op.selection_set, fragments, frozenset()))
+
+
+def operation_from_request(request) -> Tuple[str, Optional[str]]:
+    if request.method == "GET":
+        return request.GET.get("query", ""), request.GET.get("operationName")
+    content_type = request.META.get("CONTENT_TYPE", "")
+    if content_type.startswith("application/graphql"):
+        return request.body.decode("utf-8", "replace"), None
+    if content_type.startswith("application/json"):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return "", None
+        if isinstance(data, dict):
+            return data.get("query") or "", data.get("operationName")
+        return "", None
+    return request.POST.get("query", ""), request.POST.get("operationName")
+
+
+def client_key(request) -> str:
+    return request.headers.get("X-Client-Id") or request.META.get("REMOTE_ADDR", "unknown")
+
+
+# -------------------------
+# Limiter
+# -------------------------
+class Rejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, config: Dict):
+        self.config = config
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._heavy = 0
+        self._per_client: Counter = Counter()
+        self._waiting = 0
+        # Metrics
+        self._admitted: Counter = Counter()
+        self._rejected: Counter = Counter()
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._queued = 0
+
+    def is_heavy(self, op: Operation) -> bool:
+        return op.kind == "query" and op.cost >= self.config["HEAVY_COST"]
+
+    def _blocked_by(self, op: Operation, client: str) -> Optional[str]:
+        cfg = self.config
+        limit = cfg["MAX_CONCURRENT"]
+        if op.kind != "mutation":
+            limit -= cfg["MUTATION_RESERVED"]
+        if self._in_flight >= limit:
+            return "global"
+        if self.is_heavy(op) and self._heavy >= cfg["MAX_HEAVY"]:
+            return "heavy"
+        if self._per_client[client] >= cfg["MAX_PER_CLIENT"]:
+            return "client"
+        return None
+
+    def acquire(self, op: Operation, client: str) -> float:
+        """Take a slot or raise Rejected. Returns seconds spent queued."""
+        started = time.monotonic()
+        with self._cond:
+            reason = self._blocked_by(op, client)
+            if reason is not None:
+                if self._waiting >= self.config["QUEUE_SIZE"]:
+                    self._rejected["queue_full"] += 1
+                    raise Rejected("queue_full")
+                self._waiting += 1
+                self._queued += 1
+                deadline = started + self.config["QUEUE_TIMEOUT"]
+                try:
+                    while reason is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._rejected[reason] += 1
+                            raise Rejected(reason)
+                        self._cond.wait(remaining)
+                        reason = self._blocked_by(op, client)
+                finally:
+                    self._waiting -= 1
+
+            self._in_flight += 1
+            self._per_client[client] += 1
+            if self.is_heavy(op):
+                self._heavy += 1
+            waited = time.monotonic() - started
+            self._admitted["heavy" if self.is_heavy(op) else op.kind] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            return waited
+
+    def release(self, op: Operation, client: str) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._per_client[client] -= 1
+            if self._per_client[client] <= 0:
+                del self._per_client[client]
+            if self.is_heavy(op):
+                self._heavy -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            admitted = sum(self._admitted.values())
+            return {
+                "in_flight": self._in_flight,
+                "heavy_in_flight": self._heavy,
+                "queue_depth": self._waiting,
+                "admitted": dict(self._admitted),
+                "queued": self._queued,
+                "rejected": dict(self._rejected),
+                "wait_ms_avg": round(self._wait_total / admitted * 1000, 2) if admitted else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 2),
+                "limits": {k: v for k, v in self.config.items() if k != "PATH"},
+            }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(get_config())
+    return _controller
+
+
+class AdmissionControlMiddleware:
+    """Django middleware; only acts on requests to GRAPHQL_ADMISSION["PATH"]."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        controller = get_controller()
+        if request.path != controller.config["PATH"] or request.method not in ("GET", "POST"):
+            return self.get_response(request)
+
+        query, operation_name = operation_from_request(request)
+        if not query:
+            # GraphiQL page load or malformed request; nothing to execute.
+            return self.get_response(request)
+
+        op = classify(query, operation_name)
+        client = client_key(request)
+        try:
+            waited = controller.acquire(op, client)
+        except Rejected as e:
+            logger.warning("GraphQL %s (cost %s) from %s rejected: %s", op.kind, op.cost, client, e.reason)
+            response = JsonResponse(
+                {"errors": [{"message": "Server is busy, retry later.", "extensions": {"reason": e.reason}}]},
+                status=429,
+            )
+            response["Retry-After"] = str(controller.config["RETRY_AFTER"])
+            return response
+
+        try:
+            response = self.get_response(request)
+        finally:
+            controller.release(op, client)
+        response["X-Admission-Wait-Ms"] = f"{waited * 1000:.1f}"
+        return response
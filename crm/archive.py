@@ -0,0 +1,152 @@
+"""
+Hot/cold order archiving.
+
+archive_orders() moves orders older than a horizon (and their product links)
+from crm_order into ArchivedOrder in batched transactions, so the live table
+and its indexes stay bounded. allOrders only reads live orders unless
+includeArchived is set, in which case with_archived() UNIONs both.
+
+Archiving is not a logical delete: no post_delete signals, no change feed
+entries, and customer stats (crm/stats.py) count archived orders too.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import List, Mapping, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import BooleanField, QuerySet, Value, prefetch_related_objects
+from django.utils import timezone
+
+from crm.counts import refresh_table_estimate
+from crm.filters import BaseOrderFilter
+from crm.models import ArchivedOrder, Order
+from crm.stats import chunked
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+ORDER_COLUMNS = ("id", "customer_id", "total_amount", "order_date")
+ORDER_FIELDS = ("id", "customer", "total_amount", "order_date")
+
+
+class ArchivedOrderFilter(BaseOrderFilter):
+    class Meta:
+        model = ArchivedOrder
+        fields = []
+
+
+def archive_horizon(days: Optional[int] = None):
+    if days is None:
+        days = getattr(settings, "ORDER_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def _delete_rows(model, column: str, ids: List[int]) -> None:
+    """
+    Plain DELETE ... WHERE column IN (...). Deliberately not QuerySet.delete():
+    archived orders must not send post_delete (customer stats, change feed)
+    or cascade, since they live on in ArchivedOrder.
+    """
+    connection = connections[model.objects.db]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for chunk in chunked(ids):
+            cursor.execute(
+                f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+
+
+def archive_batch(before, batch_size: int) -> int:
+    """Move up to batch_size orders dated before `before`. Returns orders moved."""
+    Through = Order.products.through
+    ArchivedThrough = ArchivedOrder.products.through
+
+    with transaction.atomic():
+        rows = list(
+            Order.objects.filter(order_date__lt=before)
+            .order_by("order_date", "pk")
+            .values_list(*ORDER_COLUMNS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+
+        ArchivedOrder.objects.bulk_create(
+            [ArchivedOrder(**dict(zip(ORDER_COLUMNS, row))) for row in rows],
+            batch_size=batch_size,
+        )
+        links = Through.objects.filter(order_id__in=ids).values_list("order_id", "product_id")
+        ArchivedThrough.objects.bulk_create(
+            [ArchivedThrough(archivedorder_id=order_id, product_id=product_id) for order_id, product_id in links],
+            batch_size=batch_size,
+        )
+
+        _delete_rows(Through, Through._meta.get_field("order").column, ids)
+        _delete_rows(Order, Order._meta.pk.column, ids)
+    return len(ids)
+
+
+def archive_orders(before=None, batch_size: int = 1000) -> int:
+    """Archive every order dated before `before` (default: the configured horizon)."""
+    if before is None:
+        before = archive_horizon()
+    total = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            break
+        total += moved
+        logger.info("Archived %s orders (%s total)", moved, total)
+    if total:
+        # allOrders' approximate totalCount would still include the moved rows.
+        refresh_table_estimate(Order)
+    return total
+
+
+def with_archived(live: QuerySet, data: Mapping) -> QuerySet:
+    """
+    UNION ALL of the (already filtered) live orders with archived orders
+    matching the same filter arguments. Rows come back as Order instances with
+    an `is_archived` attribute; ordering falls back to id for non-column orderings.
+    """
+    archived = ArchivedOrderFilter(data=data, queryset=ArchivedOrder.objects.all()).qs
+
+    # Compound queries: same columns on both sides, no ORDER BY inside the parts.
+    live_part = (
+        live.select_related(None).order_by()
+        .only(*ORDER_FIELDS)
+        .annotate(is_archived=Value(False, output_field=BooleanField()))
+    )
+    archived_part = (
+        archived.order_by()
+        .only(*ORDER_FIELDS)
+        .annotate(is_archived=Value(True, output_field=BooleanField()))
+    )
+    if live.query.distinct:
+        archived_part = archived_part.distinct()
+
+    ordering = [f for f in live.query.order_by if f.lstrip("-") in ORDER_COLUMNS] or ["id"]
+    return live_part.union(archived_part, all=True).order_by(*ordering)
+
+
+def prefetch_page(orders: List[Order]) -> None:
+    """
+    Batch-load relations for a page of with_archived() rows, which lose the
+    live queryset's select_related: customers in one query, and the product
+    links of archived rows in one query, set as `archived_products` on each
+    (as Prefetch(to_attr=...) would).
+    """
+    prefetch_related_objects(orders, "customer")
+    archived = [o for o in orders if getattr(o, "is_archived", False)]
+    if not archived:
+        return
+    Through = ArchivedOrder.products.through
+    by_order = defaultdict(list)
+    links = Through.objects.filter(archivedorder_id__in=[o.pk for o in archived]).select_related("product")
+    for link in links:
+        by_order[link.archivedorder_id].append(link.product)
+    for order in archived:
+        order.archived_products = sorted(by_order[order.pk], key=lambda p: p.pk)
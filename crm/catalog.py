@@ -0,0 +1,128 @@
+"""
+In-process product catalog cache (id -> name/price snapshot, no stock).
+
+Each process keeps a size-bounded LRU of snapshots tagged with a catalog
+version stored in the shared Django cache. Product saves/deletes (and bulk
+price/name changes) replace that version with a new random token on commit,
+and every process drops its local entries the next time it sees a different
+token. Entries also expire after PRODUCT_CACHE_TTL seconds, which bounds
+staleness when the version can't reach a process (a per-process cache without
+CRM_CACHE_URL, or the key evicted). Stock is never cached: it changes on every
+restock and is read from the DB when needed.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from crm.models import Product
+from crm.stats import chunked
+
+VERSION_KEY = "crm:catalog:version"
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 30  # seconds
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: int
+    name: str
+    price: Decimal
+
+    def to_product(self) -> Product:
+        """A Product with `stock` deferred: it's loaded from the DB only if accessed."""
+        db = router.db_for_read(Product)
+        return Product.from_db(db, ["id", "name", "price"], [self.id, self.name, self.price])
+
+
+def current_version() -> str:
+    # A token, not a counter: an evicted counter would restart at a value some
+    # process may still hold, and that process would keep its stale entries.
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY) or uuid.uuid4().hex
+    return version
+
+
+def bump_version() -> None:
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate() -> None:
+    """Invalidate every process's catalog once the current transaction commits."""
+    transaction.on_commit(bump_version)
+
+
+class ProductCatalog:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[ProductSnapshot, float]]" = OrderedDict()  # pk -> (snap, expires)
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self) -> str:
+        version = current_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+        return version
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, ProductSnapshot]:
+        """Snapshots for the ids that exist; one DB query at most, for the misses."""
+        ids = {int(pk) for pk in ids}
+        version = self._sync_version()
+
+        found: Dict[int, ProductSnapshot] = {}
+        now = time.monotonic()
+        with self._lock:
+            for pk in ids:
+                entry = self._entries.get(pk)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._entries[pk]
+                    continue
+                self._entries.move_to_end(pk)
+                found[pk] = entry[0]
+
+        missing = sorted(ids - found.keys())
+        loaded = []
+        for chunk in chunked(missing):
+            for pk, name, price in Product.objects.filter(pk__in=chunk).values_list("pk", "name", "price"):
+                loaded.append(ProductSnapshot(pk, name, price))
+        found.update((s.id, s) for s in loaded)
+
+        with self._lock:
+            # Don't store rows read under a version another process has since replaced.
+            if loaded and self._version == version:
+                expires = now + self.ttl
+                for snap in loaded:
+                    self._entries[snap.id] = (snap, expires)
+                    self._entries.move_to_end(snap.id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return found
+
+    def get(self, pk: int) -> Optional[ProductSnapshot]:
+        return self.get_many([pk]).get(int(pk))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+catalog = ProductCatalog(
+    getattr(settings, "PRODUCT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+    getattr(settings, "PRODUCT_CACHE_TTL", DEFAULT_TTL),
+)
@@ -0,0 +1,160 @@
+"""
+Append-only change feed (ChangeLog) for customers, products and orders.
+
+- Single-row writes and the Order.products M2M are recorded by signals in
+  crm/signals.py, inside the writer's transaction. Deletes are the exception:
+  a cascade sends post_delete per row, so they are batched and written with
+  one record_many() per model when the transaction commits.
+- Bulk paths (bulk_create, QuerySet.update) call record_many() themselves.
+- Derived customer stats (crm/stats.py) are not recorded.
+
+Consumers read GET /changes (Server-Sent Events) from a sequence number; each
+batch is one indexed range read on ChangeLog.seq.
+"""
+import asyncio
+import json
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, models
+
+from crm.db import collect_on_commit
+from crm.models import ChangeLog, Customer, Order, Product
+from crm.stats import chunked
+
+ENTITIES = {Customer: "customer", Product: "product", Order: "order"}
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+POLL_INTERVAL = 0.5  # seconds between range reads when the feed is idle
+HEARTBEAT_INTERVAL = 15.0
+# Streams end after this long; EventSource clients reconnect with Last-Event-ID.
+MAX_STREAM_SECONDS = 300.0
+
+
+# -------------------------
+# Recording
+# -------------------------
+def _field_value(field: models.Field, instance: models.Model):
+    value = getattr(instance, field.attname)
+    if isinstance(field, models.DecimalField) and value is not None:
+        # Instances built in memory may hold ints/strs; match what the DB returns.
+        value = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def snapshot(instance: models.Model) -> Dict:
+    return {f.attname: _field_value(f, instance) for f in instance._meta.concrete_fields}
+
+
+def record(instance: models.Model, action: str, payload: Optional[Dict] = None) -> None:
+    ChangeLog.objects.create(
+        entity=ENTITIES[type(instance)],
+        action=action,
+        object_id=instance.pk,
+        payload=snapshot(instance) if payload is None else payload,
+    )
+
+
+def record_deleted(instance: models.Model) -> None:
+    model = type(instance)
+    collect_on_commit(
+        f"crm:changefeed:delete:{model._meta.label_lower}",
+        [{"id": instance.pk}],
+        lambda rows: record_many(model, "delete", rows),
+    )
+
+
+def record_order(order: Order, action: str, product_ids: Optional[Iterable[int]] = None) -> None:
+    """`product_ids` defaults to the order's current product links."""
+    payload = snapshot(order)
+    if product_ids is None:
+        product_ids = order.products.values_list("pk", flat=True)
+    payload["product_ids"] = sorted(product_ids)
+    record(order, action, payload)
+
+
+def record_many(model, action: str, rows: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Record changes for bulk writes. `rows` are payload dicts containing "id"."""
+    entity = ENTITIES[model]
+    ChangeLog.objects.bulk_create(
+        (ChangeLog(entity=entity, action=action, object_id=row["id"], payload=row) for row in rows),
+        batch_size=batch_size,
+    )
+
+
+def record_objects(objs: Sequence[models.Model], action: str) -> None:
+    if objs:
+        record_many(type(objs[0]), action, [snapshot(o) for o in objs])
+
+
+def record_updated_ids(model, ids: Iterable[int]) -> None:
+    """Re-read rows changed by QuerySet.update() and record them as updates."""
+    for chunk in chunked(sorted(set(ids))):
+        record_objects(list(model.objects.filter(pk__in=chunk)), "update")
+
+
+# -------------------------
+# Reading
+# -------------------------
+def fetch(since: int, entities: Optional[Sequence[str]] = None, limit: int = DEFAULT_BATCH_SIZE) -> List[Dict]:
+    qs = ChangeLog.objects.filter(seq__gt=since)
+    if entities:
+        qs = qs.filter(entity__in=entities)
+    rows = qs.order_by("seq").values_list("seq", "entity", "action", "object_id", "payload")[:limit]
+    return [
+        {"seq": seq, "entity": entity, "action": action, "id": object_id, "data": payload}
+        for seq, entity, action, object_id, payload in rows
+    ]
+
+
+def format_events(changes: List[Dict]) -> bytes:
+    # One write per batch; the next batch isn't read until this one is consumed.
+    return "".join(
+        f"id: {c['seq']}\nevent: {c['entity']}.{c['action']}\n"
+        f"data: {json.dumps(c, cls=DjangoJSONEncoder, separators=(',', ':'))}\n\n"
+        for c in changes
+    ).encode("utf-8")
+
+
+def stream(since: int, entities=None, batch_size=DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Blocking SSE stream for WSGI servers."""
+    started = last_sent = time.monotonic()
+    yield b"retry: 1000\n\n"
+    while time.monotonic() - started < MAX_STREAM_SECONDS:
+        changes = fetch(since, entities, batch_size)
+        # Don't hold a DB connection across idle sleeps on long-lived streams.
+        close_old_connections()
+        if changes:
+            since = changes[-1]["seq"]
+            last_sent = time.monotonic()
+            yield format_events(changes)
+            if len(changes) == batch_size:
+                continue
+        elif time.monotonic() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = time.monotonic()
+            yield b": keep-alive\n\n"
+        time.sleep(POLL_INTERVAL)
+
+
+async def astream(since: int, entities=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Non-blocking SSE stream for ASGI servers."""
+    afetch = sync_to_async(fetch)
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+    yield b"retry: 1000\n\n"
+    while loop.time() - started < MAX_STREAM_SECONDS:
+        changes = await afetch(since, entities, batch_size)
+        if changes:
+            since = changes[-1]["seq"]
+            last_sent = loop.time()
+            yield format_events(changes)
+            if len(changes) == batch_size:
+                continue
+        elif loop.time() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = loop.time()
+            yield b": keep-alive\n\n"
+        await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,106 @@
+"""
+Cheap counts for connection `totalCount`.
+
+- exact: COUNT over the filtered queryset, cached for EXACT_TTL seconds under a
+  key derived from the queryset's SQL and parameters (i.e. the normalized
+  filter arguments). DISTINCT is dropped when no multi-valued join is present.
+- approximate: unfiltered querysets use table statistics (sqlite_stat1 /
+  pg_class.reltuples, falling back to MAX(pk)); filtered ones reuse any exact
+  count computed in the last APPROX_TTL seconds before counting again. Bulk
+  deletes that bypass the ORM (order archiving) call refresh_table_estimate().
+"""
+import hashlib
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Max, QuerySet
+from django.db.models.sql.datastructures import Join
+
+EXACT_TTL = 30
+APPROX_TTL = 600
+
+
+def count_key(qs: QuerySet, prefix: str) -> str:
+    sql, params = qs.order_by().query.sql_with_params()
+    digest = hashlib.sha1(f"{sql}|{params!r}".encode("utf-8")).hexdigest()
+    return f"crm:count:{prefix}:{qs.model._meta.label_lower}:{digest}"
+
+
+def _has_multivalued_join(qs: QuerySet) -> bool:
+    for join in qs.query.alias_map.values():
+        if isinstance(join, Join):
+            field = join.join_field
+            if getattr(field, "one_to_many", False) or getattr(field, "many_to_many", False):
+                return True
+    return False
+
+
+def _count(qs: QuerySet) -> int:
+    qs = qs.order_by()
+    if qs.query.distinct and not qs.query.distinct_fields and not _has_multivalued_join(qs):
+        # DISTINCT can't change the result without a to-many join; skip the subquery.
+        qs = qs.all()
+        qs.query.distinct = False
+    return qs.count()
+
+
+def exact_count(qs: QuerySet) -> int:
+    key = count_key(qs, "exact")
+    value = cache.get(key)
+    if value is None:
+        value = _count(qs)
+        cache.set(key, value, EXACT_TTL)
+        cache.set(count_key(qs, "approx"), value, APPROX_TTL)
+    return value
+
+
+def table_key(model) -> str:
+    return f"crm:count:table:{model._meta.label_lower}"
+
+
+def table_estimate(model) -> Optional[int]:
+    alias = router.db_for_read(model)
+    connection = connections[alias]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+            if cursor.fetchone():
+                # Populated by ANALYZE; first number of `stat` is the row count.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+        elif connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0])
+    # Upper bound from the primary key index (one seek), good enough when rows are rarely deleted.
+    return model._default_manager.using(alias).aggregate(m=Max("pk"))["m"] or 0
+
+
+def approximate_count(qs: QuerySet) -> int:
+    if not qs.query.where and not qs.query.combinator:
+        key = table_key(qs.model)
+        value = cache.get(key)
+        if value is None:
+            value = table_estimate(qs.model)
+            cache.set(key, value, APPROX_TTL)
+        return value
+
+    value = cache.get(count_key(qs, "approx"))
+    return exact_count(qs) if value is None else value
+
+
+def refresh_table_estimate(model) -> None:
+    """
+    Re-ANALYZE the table and drop its cached estimate after many rows were
+    removed; otherwise MAX(pk) or old statistics keep counting them.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor in ("sqlite", "postgresql"):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+    cache.delete(table_key(model))
@@ -1,56 +1,108 @@
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
-from gql import Client, gql
-from gql.transport.requests import RequestsHTTPTransport
+import requests
+
+HEALTH_URL = "http://localhost:8000/health"
 
 
 def log_crm_heartbeat():
     """
     Appends a heartbeat line to /tmp/crm_heartbeat_log.txt:
-    DD/MM/YYYY-HH:MM:SS CRM is alive
+    DD/MM/YYYY-HH:MM:SS CRM is alive (health 12ms, db 0.4ms, graphql p95 35ms, errors 0.0%)
+    or, when the health endpoint fails or reports a problem:
+    DD/MM/YYYY-HH:MM:SS CRM is DOWN: <reason>
 
-    Also queries GraphQL hello field to verify endpoint is responsive.
+    Checks GET /health (DB ping + rolling GraphQL stats) rather than running a
+    GraphQL query. Raises after logging when unhealthy, so the scheduler
+    records the run as failed.
     """
+    started = time.perf_counter()
+    problem = None
     try:
-        transport = RequestsHTTPTransport(url="http://localhost:8000/graphql", verify=True, retries=2)
-        client = Client(transport=transport, fetch_schema_from_transport=False)
-        query = gql("{ hello }")
-        client.execute(query)
-    except Exception:
-        pass
+        resp = requests.get(HEALTH_URL, timeout=5)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        report = resp.json()
+        if resp.status_code != 200 or report.get("status") != "ok":
+            failing = [a for a, db in (report.get("databases") or {}).items() if not db.get("ok")]
+            problem = f"HTTP {resp.status_code}, databases down: {', '.join(failing) or 'none'}"
+    except (requests.RequestException, ValueError) as e:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        problem = f"{type(e).__name__}: {e}"
 
     ts = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
+    if problem is None:
+        db_ms = max(db["latency_ms"] for db in report["databases"].values())
+        graphql = report["graphql"]
+        p95 = "-" if graphql["p95_ms"] is None else f"{graphql['p95_ms']:.0f}ms"
+        line = (
+            f"{ts} CRM is alive (health {elapsed_ms:.0f}ms, db {db_ms}ms, "
+            f"graphql p95 {p95}, errors {graphql['error_rate'] * 100:.1f}%)"
+        )
+    else:
+        line = f"{ts} CRM is DOWN after {elapsed_ms:.0f}ms: {problem}"
+
     with open("/tmp/crm_heartbeat_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"{ts} CRM is alive\n")
+        f.write(line + "\n")
+    if problem is not None:
+        raise RuntimeError(line)
+    return line
 
 
 def update_low_stock():
     """
-    Runs GraphQL mutation UpdateLowStockProducts and logs results to:
-    /tmp/low_stock_updates_log.txt
-    """
-    transport = RequestsHTTPTransport(url="http://localhost:8000/graphql", verify=True, retries=3)
-    client = Client(transport=transport, fetch_schema_from_transport=False)
-
-    mutation = gql(
-        """
-        mutation {
-          updateLowStockProducts {
-            message
-            products {
-              name
-              stock
-            }
-          }
-        }
-        """
+    Reconciliation sweep for event-driven restocking (crm/restock.py):
+    queues any low-stock product that was missed, then drains the queue.
+    Logs results to /tmp/low_stock_updates_log.txt
+    """
+    from crm.restock import process_queue, sweep
+
+    sweep()
+    process_queue()
+
+
+def send_order_reminders(days=7):
+    """
+    In-process version of crm/cron_jobs/send_order_reminders.py: logs a reminder
+    for every order placed in the last `days` days to /tmp/order_reminders_log.txt
+    """
+    from django.utils import timezone
+
+    from crm.models import Order
+
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        Order.objects.filter(order_date__gte=since)
+        .order_by("order_date")
+        .values_list("pk", "customer__email")
     )
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    sent = 0
+    with open("/tmp/order_reminders_log.txt", "a", encoding="utf-8") as f:
+        for order_id, email in rows.iterator(chunk_size=2000):
+            f.write(f"{ts} - Order {order_id} reminder sent to {email}\n")
+            sent += 1
+    return sent
+
+
+def clean_inactive_customers(days=365):
+    """
+    In-process version of crm/cron_jobs/clean_inactive_customers.sh: deletes
+    customers without an order in the last `days` days.
+    Logs to /tmp/customer_cleanup_log.txt
+    """
+    from django.db.models import Q
+    from django.utils import timezone
 
-    result = client.execute(mutation)
-    payload = result.get("updateLowStockProducts") or {}
-    products = payload.get("products") or []
+    from crm.models import Customer
 
+    cutoff = timezone.now() - timedelta(days=days)
+    _, per_model = Customer.objects.filter(
+        Q(last_order_date__lt=cutoff) | Q(last_order_date__isnull=True)
+    ).delete()
+    # delete() also counts cascaded orders/links; report customers only.
+    deleted = per_model.get(Customer._meta.label, 0)
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open("/tmp/low_stock_updates_log.txt", "a", encoding="utf-8") as f:
-        for p in products:
-            f.write(f"{ts} - {p.get('name')} restocked to {p.get('stock')}\n")
+    with open("/tmp/customer_cleanup_log.txt", "a", encoding="utf-8") as f:
+        f.write(f"{ts} - Deleted {deleted} inactive customers\n")
+    return deleted
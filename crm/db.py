@@ -0,0 +1,94 @@
+"""
+SQLite tuning and read/write routing for the "sqlite-production" DB profile
+(see DB_PROFILE in alx_backend_graphql/settings.py).
+
+- apply_sqlite_pragmas: connection_created hook applying a database's PRAGMAS.
+- current_operation: whether the current GraphQL operation is a query or a
+  mutation, set once per request by crm.views.CRMGraphQLView.
+- ReadWriteRouter: sends reads during GraphQL queries to the "read" alias;
+  everything else (mutations, admin, management commands) uses "default".
+- collect_on_commit: batches per-row signal work (stats refreshes, change feed
+  deletes) into one call per transaction.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, List, Optional
+
+from django.db import transaction
+
+READ_ALIAS = "read"
+WRITE_ALIAS = "default"
+
+_operation: ContextVar[Optional[str]] = ContextVar("crm_graphql_operation", default=None)
+
+
+def current_operation() -> Optional[str]:
+    return _operation.get()
+
+
+def set_operation(operation: Optional[str]) -> None:
+    _operation.set(operation)
+
+
+@contextmanager
+def operation(name: Optional[str]):
+    """Run a block as if inside a GraphQL operation ("query" / "mutation")."""
+    token = _operation.set(name)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def collect_on_commit(key: str, items: Iterable, flush: Callable[[List], None], using: Optional[str] = None) -> None:
+    """
+    Add `items` to the current transaction's batch for `key`; `flush` gets the
+    whole batch once, on commit (right away in autocommit mode). A cascade
+    delete sends post_delete per row, so handlers use this to do one write
+    per transaction instead of one per row.
+    """
+    connection = transaction.get_connection(using)
+    batches = connection.__dict__.setdefault("crm_on_commit_batches", {})
+    entry = batches.get(key)
+    # A rolled-back transaction drops its callback; start a new batch then.
+    if entry is None or not any(func is entry[1] for _, func, _ in connection.run_on_commit):
+        batch: List = []
+
+        def run():
+            if batches.get(key, (None,))[0] is batch:
+                del batches[key]
+            flush(batch)
+
+        entry = batches[key] = (batch, run)
+        batch.extend(items)
+        transaction.on_commit(run, using=using)
+        return
+    entry[0].extend(items)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = connection.settings_dict.get("PRAGMAS") or {}
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class ReadWriteRouter:
+    def db_for_read(self, model, **hints):
+        if current_operation() == "query":
+            return READ_ALIAS
+        return WRITE_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return WRITE_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases point at the same database file.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == WRITE_ALIAS
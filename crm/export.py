@@ -0,0 +1,190 @@
+"""
+Streaming exports of orders, customers and products as NDJSON or CSV.
+
+Rows are read with QuerySet.iterator(chunk_size=...) over values_list(), so
+memory stays flat regardless of table size. Order product ids come from one
+ordered LEFT JOIN on the through table, grouped in Python by order id.
+"""
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from itertools import groupby
+from typing import Iterator, Mapping, Optional, Sequence, Tuple, Type
+
+import django_filters
+from django.core.exceptions import ValidationError
+from django.db import models
+from graphene.utils.str_converters import to_snake_case
+
+from crm.filters import CustomerFilter, OrderFilter, ProductFilter
+from crm.models import Customer, Order, Product
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_CHUNK_SIZE = 2000
+# Accumulate this many bytes before handing a piece to the response/file.
+FLUSH_BYTES = 64 * 1024
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    model: Type[models.Model]
+    filterset_class: Type[django_filters.FilterSet]
+    columns: Tuple[str, ...]
+
+
+EXPORTS = {
+    "customers": ExportSpec(
+        Customer,
+        CustomerFilter,
+        ("id", "name", "email", "phone", "created_at", "order_count", "lifetime_value", "last_order_date"),
+    ),
+    "products": ExportSpec(Product, ProductFilter, ("id", "name", "price", "stock")),
+    "orders": ExportSpec(Order, OrderFilter, ("id", "customer_id", "total_amount", "order_date")),
+}
+
+
+def filtered_queryset(entity: str, params: Mapping[str, str]) -> models.QuerySet:
+    """
+    Apply the entity's FilterSet to `params`. Keys may be snake_case
+    (order_date_gte) or the GraphQL camelCase form (orderDateGte).
+    Raises ValidationError on unknown entities or invalid filter values.
+    """
+    spec = EXPORTS.get(entity)
+    if spec is None:
+        raise ValidationError(f"Unknown export '{entity}'. Choose one of: {', '.join(EXPORTS)}.")
+
+    data = {to_snake_case(k): v for k, v in params.items()}
+    # Exports always stream in primary-key order.
+    data.pop("order_by", None)
+    unknown = set(data) - set(spec.filterset_class.base_filters)
+    if unknown:
+        raise ValidationError(f"Unknown filter(s): {', '.join(sorted(unknown))}.")
+
+    filterset = spec.filterset_class(data=data, queryset=spec.model.objects.all())
+    if not filterset.is_valid():
+        raise ValidationError(filterset.form.errors.as_json())
+    return filterset.qs
+
+
+def iter_rows(entity: str, qs: models.QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    spec = EXPORTS[entity]
+
+    if entity != "orders":
+        rows = qs.order_by("pk").values_list(*spec.columns).iterator(chunk_size=chunk_size)
+        for row in rows:
+            yield dict(zip(spec.columns, row))
+        return
+
+    # If a filter already joined products (productName/productId), re-select by pk
+    # so that join doesn't restrict the listed product ids. Either way the through
+    # table is LEFT JOINed once, ordered so each order's rows are adjacent.
+    through_table = Order.products.through._meta.db_table
+    if any(join.table_name == through_table for join in qs.query.alias_map.values()):
+        qs = Order.objects.filter(pk__in=qs.values("pk"))
+    rows = (
+        qs.order_by("pk", "products__id")
+        .values_list(*spec.columns, "products__id")
+        .iterator(chunk_size=chunk_size)
+    )
+    width = len(spec.columns)
+    for _, group in groupby(rows, key=lambda r: r[0]):
+        first = next(group)
+        row = dict(zip(spec.columns, first[:width]))
+        product_ids = [first[width]] if first[width] is not None else []
+        product_ids.extend(r[width] for r in group)
+        row["product_ids"] = product_ids
+        yield row
+
+
+def columns_for(entity: str) -> Sequence[str]:
+    columns = EXPORTS[entity].columns
+    return columns + ("product_ids",) if entity == "orders" else columns
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(entity: str, rows: Iterator[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({k: _plain(v) for k, v in row.items()}, separators=(",", ":")) + "\n"
+
+
+def _encode_csv(entity: str, rows: Iterator[dict]) -> Iterator[str]:
+    columns = columns_for(entity)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def take() -> str:
+        out = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return out
+
+    writer.writerow(columns)
+    yield take()
+    for row in rows:
+        values = []
+        for col in columns:
+            value = row[col]
+            if col == "product_ids":
+                value = ";".join(str(pk) for pk in value)
+            values.append("" if value is None else _plain(value))
+        writer.writerow(values)
+        yield take()
+
+
+def _batched(pieces: Iterator[str]) -> Iterator[bytes]:
+    buf = []
+    size = 0
+    for piece in pieces:
+        data = piece.encode("utf-8")
+        buf.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def _gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_export(
+    entity: str,
+    params: Optional[Mapping[str, str]] = None,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Validate filters eagerly, then return a lazy iterator of encoded bytes.
+    The DB is only queried once the iterator is consumed.
+    """
+    if fmt not in FORMATS:
+        raise ValidationError(f"Unknown format '{fmt}'. Choose one of: {', '.join(FORMATS)}.")
+    qs = filtered_queryset(entity, params or {})
+
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    chunks = _batched(encode(entity, iter_rows(entity, qs, chunk_size=chunk_size)))
+    return _gzipped(chunks) if compress else chunks
@@ -1,5 +1,5 @@
 import django_filters
-from crm.models import Customer, Product, Order
+from crm.models import LOW_STOCK_THRESHOLD, Customer, Product, Order
 
 
 class CustomerFilter(django_filters.FilterSet):
@@ -8,6 +8,11 @@ class CustomerFilter(django_filters.FilterSet):
     created_at_gte = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="gte")
     created_at_lte = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="lte")
 
+    # Denormalized activity stats (single-table, indexed)
+    last_order_before = django_filters.DateTimeFilter(field_name="last_order_date", lookup_expr="lt")
+    lifetime_value_gte = django_filters.NumberFilter(field_name="lifetime_value", lookup_expr="gte")
+    lifetime_value_lte = django_filters.NumberFilter(field_name="lifetime_value", lookup_expr="lte")
+
     # Challenge: phone starts with pattern (e.g. +1)
     phone_pattern = django_filters.CharFilter(method="filter_phone_pattern")
 
@@ -16,6 +21,11 @@ class CustomerFilter(django_filters.FilterSet):
             return queryset
         return queryset.filter(phone__startswith=value)
 
+    # orderBy: "-lifetimeValue" etc. (handled here, not in the resolver)
+    order_by = django_filters.OrderingFilter(
+        fields=("name", "email", "created_at", "order_count", "lifetime_value", "last_order_date"),
+    )
+
     class Meta:
         model = Customer
         fields = []
@@ -28,12 +38,12 @@ class ProductFilter(django_filters.FilterSet):
     stock_gte = django_filters.NumberFilter(field_name="stock", lookup_expr="gte")
     stock_lte = django_filters.NumberFilter(field_name="stock", lookup_expr="lte")
 
-    # Optional helper: low stock (< 10)
+    # Optional helper: low stock (< LOW_STOCK_THRESHOLD)
     low_stock = django_filters.BooleanFilter(method="filter_low_stock")
 
     def filter_low_stock(self, queryset, name, value):
         if value:
-            return queryset.filter(stock__lt=10)
+            return queryset.filter(stock__lt=LOW_STOCK_THRESHOLD)
         return queryset
 
     class Meta:
@@ -41,7 +51,8 @@ class ProductFilter(django_filters.FilterSet):
         fields = []
 
 
-class OrderFilter(django_filters.FilterSet):
+class BaseOrderFilter(django_filters.FilterSet):
+    """Filters shared by live orders and ArchivedOrder (same field names)."""
     total_amount_gte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="gte")
     total_amount_lte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="lte")
     order_date_gte = django_filters.DateTimeFilter(field_name="order_date", lookup_expr="gte")
@@ -53,6 +64,9 @@ class OrderFilter(django_filters.FilterSet):
     # Challenge: orders that include a specific product id
     product_id = django_filters.NumberFilter(field_name="products__id", lookup_expr="exact")
 
+
+class OrderFilter(BaseOrderFilter):
+    # includeArchived is applied after this filterset, by crm.schema.OrderConnectionField.
     class Meta:
         model = Order
         fields = []
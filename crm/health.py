@@ -0,0 +1,106 @@
+"""
+Health/readiness checks and rolling GraphQL request statistics.
+
+- CRMGraphQLView records every executed request (latency, success) into a
+  per-process ring buffer; no parsing or DB work is added to the request path.
+- GET /health reads one row of django_migrations from each configured
+  database (a missing SQLite file is reported, not created) and reports
+  the ring buffer's last WINDOW_SECONDS: request count, error rate and latency
+  percentiles. It answers 503 when a database is unreachable. It isn't behind
+  admission control (crm/admission.py), so probes are never rejected.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from django.db import connections
+
+RING_SIZE = 4096
+WINDOW_SECONDS = 300.0
+
+
+# -------------------------
+# Request statistics
+# -------------------------
+class RequestStats:
+    def __init__(self, size: int = RING_SIZE):
+        self._samples = deque(maxlen=size)  # (monotonic time, latency seconds, ok)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.errors = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+            self.total += 1
+            if not ok:
+                self.errors += 1
+
+    def summary(self, window: float = WINDOW_SECONDS) -> Dict:
+        cutoff = time.monotonic() - window
+        with self._lock:
+            recent = [(latency, ok) for at, latency, ok in self._samples if at >= cutoff]
+            total, errors = self.total, self.errors
+        latencies = sorted(latency for latency, _ in recent)
+        failed = sum(1 for _, ok in recent if not ok)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 2)
+
+        return {
+            "window_s": window,
+            "requests": len(recent),
+            "error_rate": round(failed / len(recent), 4) if recent else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+            "since_start": {"requests": total, "errors": errors},
+        }
+
+
+_stats: Optional[RequestStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_stats() -> RequestStats:
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = RequestStats()
+    return _stats
+
+
+# -------------------------
+# Database
+# -------------------------
+def ping_database(alias: str) -> Dict:
+    started = time.perf_counter()
+    connection = connections[alias]
+    name = str(connection.settings_dict["NAME"])
+    # Connecting would create an empty database file.
+    if connection.vendor == "sqlite" and not connection.is_in_memory_db() and not os.path.exists(name):
+        return {"ok": False, "error": f"Database file {name} does not exist."}
+    try:
+        with connection.cursor() as cursor:
+            # Unlike SELECT 1, this reads the database itself.
+            cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+            cursor.fetchone()
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+def check() -> Dict:
+    databases = {alias: ping_database(alias) for alias in connections}
+    ok = all(db["ok"] for db in databases.values())
+    return {
+        "status": "ok" if ok else "unavailable",
+        "databases": databases,
+        "graphql": get_stats().summary(),
+    }
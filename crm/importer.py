@@ -0,0 +1,311 @@
+"""
+Batch importers for customers, products and orders (used by `manage.py import_crm`).
+
+Rows are validated in memory with the same rules as the GraphQL mutations,
+foreign keys are resolved with one lookup query per batch, and valid rows are
+written with bulk_create inside a single transaction per batch.
+"""
+import csv
+import gzip
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from graphql import GraphQLError
+
+from crm import changefeed
+from crm.models import Customer, Order, Product
+from crm.restock import request_restock_bulk
+from crm.schema import PRICE_INTEGER_DIGITS, clean_product_input, to_decimal, validate_phone
+from crm.stats import chunked, refresh_customer_stats
+
+FORMATS = ("csv", "ndjson")
+
+Row = Tuple[int, dict]  # (1-based data row number, parsed row)
+
+
+class RowError(Exception):
+    pass
+
+
+# Anything a single row's data can raise; the row is rejected, the run goes on.
+ROW_ERRORS = (RowError, GraphQLError, ValidationError, ArithmeticError, TypeError, ValueError)
+
+
+@dataclass
+class BatchResult:
+    created: int = 0
+    rejected: List[Tuple[int, dict, str]] = field(default_factory=list)
+
+
+# -------------------------
+# Reading
+# -------------------------
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    raise ValueError(f"Cannot infer format from '{path}'; pass --format.")
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Row]:
+    """Stream rows from a CSV or NDJSON file (optionally .gz) one at a time."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=1):
+                yield n, row
+            return
+
+        n = 0
+        for line in f:
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = {"_raw": line.rstrip("\n")}
+            yield n, row if isinstance(row, dict) else {"_raw": row}
+
+
+# -------------------------
+# Field helpers
+# -------------------------
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, GraphQLError):
+        return exc.message
+    if isinstance(exc, ValidationError):
+        return "; ".join(exc.messages)
+    return str(exc)
+
+
+def _required(row: dict, key: str) -> str:
+    if "_raw" in row:
+        raise RowError("Malformed row.")
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        raise RowError(f"Missing {key}.")
+    return str(value).strip()
+
+
+def _optional(row: dict, key: str) -> Optional[str]:
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        return None
+    return str(value).strip()
+
+
+def _id_list(value) -> List:
+    # CSV uses the export format ("1;2;3"); NDJSON may use a real list.
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return value
+    return [v for v in str(value).split(";") if v.strip()]
+
+
+def _parse_date(value: Optional[str]) -> datetime:
+    if value is None:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise RowError("Invalid order_date.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+# -------------------------
+# Importers (one batch each)
+# -------------------------
+def import_customers(batch: List[Row], batch_size: int) -> BatchResult:
+    result = BatchResult()
+    pending = []
+    seen = set()
+
+    for n, row in batch:
+        try:
+            name = _required(row, "name")
+            email = _required(row, "email")
+            phone = _optional(row, "phone")
+            validate_email(email)
+            validate_phone(phone)
+            if email in seen:
+                raise RowError("Duplicate email in file.")
+            seen.add(email)
+            pending.append((n, row, Customer(name=name, email=email, phone=phone)))
+        except ROW_ERRORS as e:
+            result.rejected.append((n, row, _error_message(e)))
+
+    existing = set()
+    for emails in chunked([c.email for _, _, c in pending]):
+        existing.update(Customer.objects.filter(email__in=emails).values_list("email", flat=True))
+
+    objs = []
+    for n, row, customer in pending:
+        if customer.email in existing:
+            result.rejected.append((n, row, "Email already exists."))
+        else:
+            objs.append(customer)
+
+    with transaction.atomic():
+        Customer.objects.bulk_create(objs, batch_size=batch_size)
+        changefeed.record_objects(objs, "create")
+    result.created = len(objs)
+    return result
+
+
+def import_products(batch: List[Row], batch_size: int) -> BatchResult:
+    result = BatchResult()
+    objs = []
+
+    for n, row in batch:
+        try:
+            name, price, stock, _ = clean_product_input({
+                "name": _required(row, "name"),
+                "price": _required(row, "price"),
+                "stock": _optional(row, "stock") or 0,
+            })
+            objs.append(Product(name=name, price=price, stock=stock))
+        except ROW_ERRORS as e:
+            result.rejected.append((n, row, _error_message(e)))
+
+    with transaction.atomic():
+        Product.objects.bulk_create(objs, batch_size=batch_size)
+        changefeed.record_objects(objs, "create")
+        request_restock_bulk(p.pk for p in objs)
+    result.created = len(objs)
+    return result
+
+
+def _customer_map(batch: List[Row]) -> Tuple[set, Dict[str, int]]:
+    ids = {str(r["customer_id"]).strip() for _, r in batch if _optional(r, "customer_id")}
+    emails = {str(r["customer_email"]).strip() for _, r in batch if _optional(r, "customer_email")}
+
+    known_ids = set()
+    for chunk in chunked(sorted(i for i in ids if i.isdigit())):
+        known_ids.update(Customer.objects.filter(pk__in=chunk).values_list("pk", flat=True))
+    by_email = {}
+    for chunk in chunked(sorted(emails)):
+        by_email.update(Customer.objects.filter(email__in=chunk).values_list("email", "pk"))
+    return known_ids, by_email
+
+
+def _product_map(batch: List[Row]) -> Tuple[Dict[int, Decimal], Dict[str, Tuple[int, Decimal]]]:
+    ids, names = set(), set()
+    for _, r in batch:
+        ids.update(str(v).strip() for v in _id_list(r.get("product_ids")))
+        names.update(str(v).strip() for v in _id_list(r.get("product_names")))
+
+    price_by_id = {}
+    for chunk in chunked(sorted(i for i in ids if i.isdigit())):
+        price_by_id.update(Product.objects.filter(pk__in=chunk).values_list("pk", "price"))
+    by_name = {}
+    for chunk in chunked(sorted(names)):
+        # Product names aren't unique; the oldest product wins.
+        for name, pk, price in Product.objects.filter(name__in=chunk).order_by("pk").values_list("name", "pk", "price"):
+            by_name.setdefault(name, (pk, price))
+    return price_by_id, by_name
+
+
+def import_orders(batch: List[Row], batch_size: int) -> BatchResult:
+    """
+    Rows reference customers by `customer_id` or `customer_email` and products
+    by `product_ids` or `product_names`. `total_amount` defaults to the sum of
+    product prices, as in CreateOrder.
+    """
+    result = BatchResult()
+    known_customers, customer_by_email = _customer_map(batch)
+    price_by_id, product_by_name = _product_map(batch)
+
+    orders: List[Order] = []
+    product_lists: List[List[int]] = []
+
+    for n, row in batch:
+        try:
+            if "_raw" in row:
+                raise RowError("Malformed row.")
+
+            customer_id = _optional(row, "customer_id")
+            email = _optional(row, "customer_email")
+            if customer_id is not None:
+                customer_pk = int(customer_id) if customer_id.isdigit() else None
+                if customer_pk not in known_customers:
+                    raise RowError("Invalid customer ID.")
+            elif email is not None:
+                customer_pk = customer_by_email.get(email)
+                if customer_pk is None:
+                    raise RowError("Invalid customer email.")
+            else:
+                raise RowError("Missing customer_id.")
+
+            product_pks = []
+            total = Decimal("0.00")
+            for raw in _id_list(row.get("product_ids")):
+                raw = str(raw).strip()
+                pk = int(raw) if raw.isdigit() else None
+                if pk not in price_by_id:
+                    raise RowError("Invalid product ID.")
+                product_pks.append(pk)
+                total += price_by_id[pk]
+            for raw in _id_list(row.get("product_names")):
+                match = product_by_name.get(str(raw).strip())
+                if match is None:
+                    raise RowError("Invalid product name.")
+                product_pks.append(match[0])
+                total += match[1]
+            product_pks = list(dict.fromkeys(product_pks))
+            if not product_pks:
+                raise RowError("At least one product must be selected.")
+
+            amount = _optional(row, "total_amount")
+            if amount is not None:
+                total = to_decimal(amount)
+                if not total.is_finite() or total < 0:
+                    raise RowError("Total amount must be non-negative.")
+                if total.adjusted() >= PRICE_INTEGER_DIGITS:
+                    raise RowError(f"Total amount must have at most {PRICE_INTEGER_DIGITS} digits before the decimal point.")
+
+            orders.append(Order(
+                customer_id=customer_pk,
+                total_amount=total,
+                order_date=_parse_date(_optional(row, "order_date")),
+            ))
+            product_lists.append(product_pks)
+        except ROW_ERRORS as e:
+            result.rejected.append((n, row, _error_message(e)))
+
+    Through = Order.products.through
+    with transaction.atomic():
+        Order.objects.bulk_create(orders, batch_size=batch_size)
+        links = [
+            Through(order_id=order.pk, product_id=pk)
+            for order, pks in zip(orders, product_lists)
+            for pk in pks
+        ]
+        Through.objects.bulk_create(links, batch_size=batch_size)
+        changefeed.record_many(Order, "create", (
+            {**changefeed.snapshot(order), "product_ids": sorted(pks)}
+            for order, pks in zip(orders, product_lists)
+        ))
+        # bulk_create skips signals; keep the denormalized stats in step.
+        refresh_customer_stats({o.customer_id for o in orders})
+    result.created = len(orders)
+    return result
+
+
+IMPORTERS: Dict[str, Callable[[List[Row], int], BatchResult]] = {
+    "customers": import_customers,
+    "products": import_products,
+    "orders": import_orders,
+}
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from crm.archive import archive_horizon, archive_orders
+
+
+class Command(BaseCommand):
+    help = "Move orders older than the archive horizon (and their product links) to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Default: settings.ORDER_ARCHIVE_AFTER_DAYS.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = archive_horizon(options["older_than_days"])
+        archived = archive_orders(before=before, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} orders dated before {before:%Y-%m-%d %H:%M}."))
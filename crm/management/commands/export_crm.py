@@ -0,0 +1,53 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.export import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream customers, products or orders to NDJSON/CSV with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("entity", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output on the fly.")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Filter argument, e.g. --filter orderDateGte=2025-01-01T00:00:00Z (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options["filter"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid --filter '{item}', expected NAME=VALUE.")
+            params[name] = value
+
+        try:
+            chunks = stream_export(
+                options["entity"],
+                params,
+                fmt=options["format"],
+                compress=options["gzip"],
+                chunk_size=max(1, options["chunk_size"]),
+            )
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
@@ -0,0 +1,96 @@
+import json
+import os
+import resource
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.importer import FORMATS, IMPORTERS, detect_format, read_rows
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = "Stream customers, products or orders from a CSV/NDJSON file into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("entity", choices=sorted(IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Default: inferred from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--errors", help="Rejected rows file (default: <path>.errors.ndjson).")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json).")
+        parser.add_argument("--resume", action="store_true", help="Skip rows already committed per the checkpoint.")
+
+    def handle(self, *args, **options):
+        entity = options["entity"]
+        path = options["path"]
+        batch_size = max(1, options["batch_size"])
+        errors_path = options["errors"] or f"{path}.errors.ndjson"
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint.json"
+
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+        try:
+            fmt = options["format"] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        done = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("entity") != entity or state.get("path") != os.path.abspath(path):
+                raise CommandError(f"Checkpoint {checkpoint_path} belongs to a different import.")
+            done = int(state["rows_done"])
+            self.stdout.write(f"Resuming after row {done}.")
+
+        importer = IMPORTERS[entity]
+        rows = islice(read_rows(path, fmt), done, None)
+        created_total = rejected_total = 0
+        started = time.monotonic()
+
+        with open(errors_path, "a" if done else "w", encoding="utf-8") as errors:
+            batch_no = 0
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                batch_no += 1
+
+                t0 = time.monotonic()
+                result = importer(batch, batch_size)
+                elapsed = time.monotonic() - t0
+
+                for n, row, message in result.rejected:
+                    errors.write(json.dumps({"row": n, "error": message, "data": row}, default=str) + "\n")
+                errors.flush()
+
+                done = batch[-1][0]
+                self._write_checkpoint(checkpoint_path, entity, path, done)
+
+                created_total += result.created
+                rejected_total += len(result.rejected)
+                self.stdout.write(
+                    f"batch {batch_no}: {len(batch)} rows ({result.created} created, "
+                    f"{len(result.rejected)} rejected) in {elapsed:.2f}s, "
+                    f"{len(batch) / elapsed if elapsed else 0:.0f} rows/s, peak RSS {peak_rss_mb():.1f} MB"
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created_total} {entity}, rejected {rejected_total} in {elapsed:.2f}s "
+            f"(last row {done}). Rejected rows: {errors_path}"
+        ))
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_path, entity, path, rows_done):
+        # Written after each committed batch; replace atomically so a crash never leaves half a file.
+        tmp = f"{checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entity": entity, "path": os.path.abspath(path), "rows_done": rows_done}, f)
+        os.replace(tmp, checkpoint_path)
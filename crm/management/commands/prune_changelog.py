@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from crm.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = "Delete change feed entries older than --keep-days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["keep_days"])
+        deleted = 0
+        while True:
+            batch = list(
+                ChangeLog.objects.filter(created_at__lt=cutoff)
+                .order_by("seq")
+                .values_list("seq", flat=True)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            deleted += ChangeLog.objects.filter(seq__lte=batch[-1], seq__gte=batch[0]).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change feed entries."))
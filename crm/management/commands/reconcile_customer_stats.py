@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crm.models import Customer
+from crm.stats import chunked, refresh_customer_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized customer stats (order count, lifetime value, last order date) from orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        ids = list(Customer.objects.order_by("pk").values_list("pk", flat=True))
+
+        updated = 0
+        for batch in chunked(ids, batch_size):
+            with transaction.atomic():
+                updated += refresh_customer_stats(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled stats for {updated} customers."))
@@ -0,0 +1,55 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from crm.scheduler import Scheduler, get_jobs, history, run_job
+
+
+class Command(BaseCommand):
+    help = "Run the CRM periodic jobs in this process (see crm/scheduler.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--run", metavar="JOB", action="append", help="Run these jobs once now and exit.")
+        parser.add_argument("--list", action="store_true", help="List jobs and their next run time.")
+        parser.add_argument("--history", action="store_true", help="Show per-job duration history.")
+        parser.add_argument("--days", type=int, default=30, help="History window for --history.")
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        jobs = get_jobs()
+
+        if options["list"]:
+            now = timezone.now()
+            for name, job in jobs.items():
+                self.stdout.write(f"{name:<20}{job.expression:<16}{job.task:<40}next {job.next_run(now):%Y-%m-%d %H:%M}")
+            return
+
+        if options["history"]:
+            self.stdout.write(
+                f"{'job':<20}{'runs':>6}{'errors':>8}{'skipped':>9}{'avg ms':>10}{'p95 ms':>10}{'max ms':>10}  last"
+            )
+            for row in history(days=options["days"]):
+                avg = f"{row['avg_ms']:.0f}" if row["avg_ms"] is not None else "-"
+                p95 = f"{row['p95_ms']:.0f}" if row["p95_ms"] is not None else "-"
+                self.stdout.write(
+                    f"{row['job']:<20}{row['runs']:>6}{row['errors']:>8}{row['skipped']:>9}{avg:>10}{p95:>10}"
+                    f"{row['max_ms']:>10.0f}  {row['last_status']} {row['last_started']:%Y-%m-%d %H:%M}"
+                )
+            return
+
+        if options["run"]:
+            unknown = set(options["run"]) - set(jobs)
+            if unknown:
+                raise CommandError(f"Unknown job(s): {', '.join(sorted(unknown))}. Known: {', '.join(jobs)}.")
+            for name in options["run"]:
+                run = run_job(jobs[name])
+                style = self.style.SUCCESS if run.status == "ok" else self.style.WARNING
+                self.stdout.write(style(f"{name}: {run.status} in {run.duration_ms:.0f}ms {run.detail}".rstrip()))
+            return
+
+        scheduler = Scheduler(jobs, max_workers=max(1, options["workers"]))
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        self.stdout.write(f"Scheduler running {len(jobs)} jobs; Ctrl+C to stop.")
+        scheduler.run_forever()
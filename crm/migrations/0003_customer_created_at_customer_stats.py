@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+import django.utils.timezone
+
+
+def populate_customer_stats(apps, schema_editor):
+    Customer = apps.get_model("crm", "Customer")
+    Order = apps.get_model("crm", "Order")
+
+    rows = (
+        Order.objects.order_by()
+        .values("customer_id")
+        .annotate(n=Count("id"), ltv=Sum("total_amount"), last=Max("order_date"))
+    )
+    for row in rows.iterator():
+        Customer.objects.filter(pk=row["customer_id"]).update(
+            order_count=row["n"],
+            lifetime_value=row["ltv"] or Decimal("0.00"),
+            last_order_date=row["last"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0002_alter_customer_name_alter_customer_phone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='order_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='lifetime_value',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_order_date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_customer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=64)),
+                ('started_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField(default=0)),
+                ('status', models.CharField(choices=[('ok', 'ok'), ('error', 'error'), ('skipped', 'skipped')], max_length=8)),
+                ('detail', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', 'started_at'], name='crm_jobrun_job_started_idx')],
+            },
+        ),
+    ]
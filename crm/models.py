@@ -1,4 +1,5 @@
 from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
@@ -9,24 +10,109 @@ class Customer(models.Model):
     phone = models.CharField(max_length=15, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized activity stats, maintained by crm.stats (see crm/signals.py).
+    # Kept on the customer row so inactivity / LTV queries never join orders.
+    order_count = models.PositiveIntegerField(default=0)
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"), db_index=True)
+    last_order_date = models.DateTimeField(blank=True, null=True, db_index=True)
+
     def __str__(self):
         return self.name
 
 
+LOW_STOCK_THRESHOLD = 10
+
+
 class Product(models.Model):
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=12, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    # External catalog key used by bulkUpsertProducts; optional, unique when set.
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Partial index: the low-stock reconciliation sweep only touches these rows.
+            models.Index(
+                fields=["stock"],
+                name="crm_product_low_stock_idx",
+                condition=models.Q(stock__lt=LOW_STOCK_THRESHOLD),
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RestockRequest(models.Model):
+    """Pending restock for a product; at most one per product (deduplicated queue)."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name="restock_request")
+    requested_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Restock {self.product_id}"
+
+
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="orders")
     products = models.ManyToManyField(Product, related_name="orders")
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
-    order_date = models.DateTimeField(default=timezone.now)
+    order_date = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self):
         return f"Order {self.id}"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Cold copy of an Order moved out of the live table by crm/archive.py.
+    Keeps the original order id; columns mirror Order so the two can be UNIONed.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="archived_orders")
+    products = models.ManyToManyField(Product, related_name="archived_orders")
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    order_date = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived order {self.id}"
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only change feed for customers, products and orders (see crm/changefeed.py).
+    `seq` is monotonically increasing; consumers resume from the last seq they saw.
+    """
+    ENTITY_CHOICES = (("customer", "customer"), ("product", "product"), ("order", "order"))
+    ACTION_CHOICES = (("create", "create"), ("update", "update"), ("delete", "delete"))
+
+    seq = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=16, choices=ENTITY_CHOICES)
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    object_id = models.BigIntegerField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["entity", "seq"], name="crm_changelog_entity_seq_idx")]
+
+    def __str__(self):
+        return f"{self.seq} {self.entity}.{self.action} {self.object_id}"
+
+
+class JobRun(models.Model):
+    """One run of a scheduled job (see crm/scheduler.py), kept as duration history."""
+    STATUS_CHOICES = (("ok", "ok"), ("error", "error"), ("skipped", "skipped"))
+
+    job = models.CharField(max_length=64)
+    started_at = models.DateTimeField()
+    duration_ms = models.FloatField(default=0)
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES)
+    detail = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [models.Index(fields=["job", "started_at"], name="crm_jobrun_job_started_idx")]
+
+    def __str__(self):
+        return f"{self.job} {self.started_at:%Y-%m-%d %H:%M:%S} {self.status} {self.duration_ms:.0f}ms"
@@ -0,0 +1,137 @@
+"""
+Event-driven low-stock restocking.
+
+Product writes that leave stock below LOW_STOCK_THRESHOLD enqueue a
+RestockRequest (one per product) and, once committed, kick the
+crm.tasks.process_restock_queue Celery task. crm.cron.update_low_stock is
+only a reconciliation sweep over the partial low-stock index.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+
+from crm import changefeed
+from crm.models import LOW_STOCK_THRESHOLD, Product, RestockRequest
+from crm.stats import chunked
+
+logger = logging.getLogger(__name__)
+
+RESTOCK_AMOUNT = 10
+RESTOCK_LOG = "/tmp/low_stock_updates_log.txt"
+# One attempt per publish: delay()'s default policy retries a down broker for
+# ~0.7s, and retry=False falls back to kombu's connection retries (~6s).
+PUBLISH_RETRY_POLICY = {"max_retries": 0}
+
+_publisher: Optional[ThreadPoolExecutor] = None
+_publisher_lock = threading.Lock()
+
+
+def _get_publisher() -> ThreadPoolExecutor:
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crm-restock-publish")
+    return _publisher
+
+
+def _publish() -> None:
+    from crm.tasks import process_restock_queue
+
+    try:
+        process_restock_queue.apply_async(retry_policy=PUBLISH_RETRY_POLICY)
+    except Exception as e:
+        # Broker down: the request stays queued and the cron sweep will pick it up.
+        logger.warning("Could not enqueue process_restock_queue: %s", e)
+
+
+def schedule_processing() -> None:
+    """
+    Ask a worker to drain the queue after the current transaction commits.
+    The publish runs on a background thread, so a slow or unreachable broker
+    never holds up the request (or import batch) that queued the restock.
+    """
+    transaction.on_commit(lambda: _get_publisher().submit(_publish))
+
+
+def request_restock(product: Product) -> None:
+    """Called on product saves; cheap no-op unless stock is low."""
+    if product.stock >= LOW_STOCK_THRESHOLD:
+        return
+    _, created = RestockRequest.objects.get_or_create(product_id=product.pk)
+    if created:
+        schedule_processing()
+
+
+def request_restock_bulk(product_ids: Iterable[int]) -> None:
+    """For bulk paths (bulk_create / bulk_update / QuerySet.update) that skip signals."""
+    ids = sorted({int(pk) for pk in product_ids})
+    queued = 0
+    for chunk in chunked(ids):
+        low = Product.objects.filter(pk__in=chunk, stock__lt=LOW_STOCK_THRESHOLD).values_list("pk", flat=True)
+        queued += len(RestockRequest.objects.bulk_create(
+            [RestockRequest(product_id=pk) for pk in low],
+            ignore_conflicts=True,
+        ))
+    if queued:
+        schedule_processing()
+
+
+def restock(product_ids: List[int]) -> List[Tuple[str, int]]:
+    """
+    Add RESTOCK_AMOUNT to the given products that are still low, in one UPDATE.
+    Returns (name, new_stock) for the products that were restocked.
+    """
+    with transaction.atomic():
+        low = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=product_ids, stock__lt=LOW_STOCK_THRESHOLD)
+            .values_list("pk", flat=True)
+        )
+        # QuerySet.update() skips post_save, so restocking never re-enqueues itself.
+        # Stock isn't part of the catalog cache (crm/catalog.py), so no invalidation either.
+        Product.objects.filter(pk__in=low).update(stock=F("stock") + RESTOCK_AMOUNT)
+        changefeed.record_updated_ids(Product, low)
+        RestockRequest.objects.filter(product_id__in=product_ids).delete()
+        return list(Product.objects.filter(pk__in=low).order_by("pk").values_list("name", "stock"))
+
+
+def process_queue(batch_size: int = 500) -> int:
+    """Drain the restock queue in batches, oldest first. Returns products restocked."""
+    total = 0
+    while True:
+        ids = list(
+            RestockRequest.objects.order_by("requested_at", "pk")
+            .values_list("product_id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        restocked = restock(ids)
+        total += len(restocked)
+        log_restocked(restocked)
+
+
+def sweep() -> int:
+    """
+    Reconciliation: queue any low-stock product that was missed (partial index
+    scan; already-queued products are skipped by the unique constraint).
+    Returns the number of low-stock products found.
+    """
+    low = Product.objects.filter(stock__lt=LOW_STOCK_THRESHOLD).values_list("pk", flat=True)
+    requests = [RestockRequest(product_id=pk) for pk in low]
+    RestockRequest.objects.bulk_create(requests, batch_size=500, ignore_conflicts=True)
+    return len(requests)
+
+
+def log_restocked(restocked: List[Tuple[str, int]]) -> None:
+    if not restocked:
+        return
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(RESTOCK_LOG, "a", encoding="utf-8") as f:
+        for name, stock in restocked:
+            f.write(f"{ts} - {name} restocked to {stock}\n")
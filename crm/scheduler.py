@@ -0,0 +1,187 @@
+"""
+Resident job scheduler.
+
+`python manage.py run_scheduler` runs the periodic CRM jobs in one long-lived
+process instead of cron starting a fresh interpreter (django.setup(), graphene
+and gql imports, new DB connection) for every run:
+- schedules are cron expressions (SCHEDULER_JOBS in settings);
+- due jobs run on a small thread pool, so a slow report never delays the heartbeat;
+- a lock in the Django cache stops runs of the same job from overlapping
+  (across processes too when CRM_CACHE_URL points at a shared cache);
+- every run, including skipped ones, is stored in JobRun with its duration;
+- the resident process keeps its DB connections open between runs
+  (keep_connections_warm sets CONN_MAX_AGE when the DB profile leaves it at 0),
+  and run_job calls close_old_connections() once, before the job, to replace
+  expired or broken ones.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from celery.schedules import crontab
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from crm.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_TIMEOUT = 3600  # seconds; a crashed run can't block its job for longer
+HISTORY_DAYS = 30
+MAX_SLEEP = 60.0
+CONN_MAX_AGE = 600  # seconds; used by the scheduler process when settings say 0
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    task: str
+    expression: str
+    lock_timeout: int = DEFAULT_LOCK_TIMEOUT
+
+    def schedule(self, now: datetime) -> crontab:
+        minute, hour, day_of_month, month_of_year, day_of_week = self.expression.split()
+        return crontab(
+            minute=minute, hour=hour, day_of_month=day_of_month,
+            month_of_year=month_of_year, day_of_week=day_of_week,
+            nowfun=lambda: now,
+        )
+
+    def next_run(self, after: datetime) -> datetime:
+        """First cron time strictly after `after`."""
+        # crontab measures "remaining" from nowfun(); pin it to `after`.
+        # Cron expressions are in local time (settings.TIME_ZONE), like crontab's.
+        after = timezone.localtime(after).replace(second=0, microsecond=0)
+        return after + self.schedule(after).remaining_estimate(after)
+
+
+def get_jobs() -> Dict[str, Job]:
+    config = getattr(settings, "SCHEDULER_JOBS", {})
+    return {
+        name: Job(name, spec["task"], spec["schedule"], spec.get("lock_timeout", DEFAULT_LOCK_TIMEOUT))
+        for name, spec in config.items()
+    }
+
+
+# -------------------------
+# Running one job
+# -------------------------
+def _record(job: Job, started_at: datetime, duration: float, status: str, detail: str = "") -> JobRun:
+    run = JobRun.objects.create(
+        job=job.name, started_at=started_at, duration_ms=round(duration * 1000, 2),
+        status=status, detail=detail[:2000],
+    )
+    JobRun.objects.filter(job=job.name, started_at__lt=started_at - timedelta(days=HISTORY_DAYS)).delete()
+    return run
+
+
+def keep_connections_warm(max_age: int = CONN_MAX_AGE) -> None:
+    """Give every database a non-zero CONN_MAX_AGE (with health checks) unless it has one."""
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        if not settings_dict.get("CONN_MAX_AGE"):
+            settings_dict["CONN_MAX_AGE"] = max_age
+            settings_dict["CONN_HEALTH_CHECKS"] = True
+
+
+def run_job(job: Job) -> JobRun:
+    """Run `job` now unless a previous run still holds its lock."""
+    lock_key = f"crm:job-lock:{job.name}"
+    token = uuid.uuid4().hex
+    started_at = timezone.now()
+    # Once per run: drops this thread's connection only if expired or unusable.
+    close_old_connections()
+    if not cache.add(lock_key, token, job.lock_timeout):
+        logger.warning("Skipping %s: previous run still in progress", job.name)
+        return _record(job, started_at, 0.0, "skipped", "previous run still in progress")
+
+    t0 = time.perf_counter()
+    try:
+        result = import_string(job.task)()
+        status, detail = "ok", "" if result is None else str(result)
+    except Exception as e:
+        logger.exception("Job %s failed", job.name)
+        status, detail = "error", f"{type(e).__name__}: {e}"
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    duration = time.perf_counter() - t0
+    logger.info("Job %s %s in %.0fms", job.name, status, duration * 1000)
+    return _record(job, started_at, duration, status, detail)
+
+
+# -------------------------
+# Resident loop
+# -------------------------
+class Scheduler:
+    def __init__(self, jobs: Dict[str, Job], max_workers: int = 4):
+        self.jobs = jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crm-job")
+        self.next_runs: Dict[str, datetime] = {}
+        self._stop = threading.Event()
+
+    def stop(self, *args) -> None:
+        self._stop.set()
+
+    def tick(self, now: datetime) -> List[str]:
+        """Submit every job that is due at `now`; returns their names."""
+        started = []
+        for name, job in self.jobs.items():
+            due = self.next_runs.get(name)
+            if due is None:
+                self.next_runs[name] = job.next_run(now)
+            elif due <= now:
+                self.executor.submit(run_job, job)
+                self.next_runs[name] = job.next_run(now)
+                started.append(name)
+        return started
+
+    def run_forever(self) -> None:
+        keep_connections_warm()
+        logger.info("Scheduler started with jobs: %s", ", ".join(self.jobs))
+        try:
+            while not self._stop.is_set():
+                now = timezone.now()
+                self.tick(now)
+                wait = (min(self.next_runs.values()) - now).total_seconds() if self.next_runs else MAX_SLEEP
+                self._stop.wait(min(max(wait, 0.0), MAX_SLEEP))
+        finally:
+            self.executor.shutdown(wait=True)
+            logger.info("Scheduler stopped")
+
+
+# -------------------------
+# History
+# -------------------------
+def history(job: Optional[str] = None, days: int = HISTORY_DAYS) -> List[Dict]:
+    """Per-job run counts and durations over the last `days` days."""
+    qs = JobRun.objects.filter(started_at__gte=timezone.now() - timedelta(days=days))
+    if job:
+        qs = qs.filter(job=job)
+    summary = []
+    for row in qs.values("job").annotate(
+        runs=Count("pk"),
+        errors=Count("pk", filter=Q(status="error")),
+        skipped=Count("pk", filter=Q(status="skipped")),
+        avg_ms=Avg("duration_ms", filter=Q(status="ok")),
+        max_ms=Max("duration_ms"),
+        last_started=Max("started_at"),
+    ).order_by("job"):
+        durations = sorted(
+            qs.filter(job=row["job"], status="ok").values_list("duration_ms", flat=True)
+        )
+        row["p95_ms"] = durations[min(len(durations) - 1, int(0.95 * len(durations)))] if durations else None
+        row["last_status"] = (
+            qs.filter(job=row["job"]).order_by("-started_at").values_list("status", flat=True).first()
+        )
+        summary.append(row)
+    return summary
@@ -1,18 +1,89 @@
 import re
 from decimal import Decimal
-from typing import Optional
+from functools import partial
+from typing import Optional, Tuple
 
 import graphene
 from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
 from django.utils import timezone
+from graphene.relay.connection import connection_adapter, page_info_adapter
 from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
 from graphql import GraphQLError
+from graphql_relay import connection_from_array_slice, cursor_to_offset, get_offset_with_default, offset_to_cursor
 
+from crm import changefeed, counts
+from crm.catalog import catalog
 from crm.filters import CustomerFilter, ProductFilter, OrderFilter
-from crm.models import Product
-from crm.models import Customer, Order
-from crm.models import Product
+from crm.models import LOW_STOCK_THRESHOLD, Customer, Order, Product
+from crm.restock import RESTOCK_AMOUNT
+
+
+# -------------------------
+# Connections (totalCount + count-free paging)
+# -------------------------
+class CountMode(graphene.Enum):
+    EXACT = "exact"
+    APPROXIMATE = "approximate"
+
+
+class CountableConnection(graphene.relay.Connection):
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(mode=CountMode(default_value=CountMode.EXACT.value))
+
+    def resolve_total_count(self, info, mode=CountMode.EXACT.value):
+        if not isinstance(self.iterable, QuerySet):
+            return len(self.iterable)
+        if mode == CountMode.APPROXIMATE.value:
+            return counts.approximate_count(self.iterable)
+        return counts.exact_count(self.iterable)
+
+
+class CountableConnectionField(DjangoFilterConnectionField):
+    """
+    Pages forward by fetching first+1 rows instead of running COUNT(*) on
+    every request; the count is only computed (and cached) for totalCount.
+    Backward paging (last/before) keeps graphene-django's behaviour.
+    """
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        iterable = maybe_queryset(iterable)
+        if not isinstance(iterable, QuerySet) or args.get("last") is not None or args.get("before"):
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+
+        offset = args.pop("offset", None)
+        if offset:
+            after = args.get("after")
+            if after:
+                offset += cursor_to_offset(after) + 1
+            args["after"] = offset_to_cursor(offset - 1)
+
+        first = args.get("first")
+        if first is None and max_limit is not None:
+            first = args["first"] = max_limit
+
+        slice_start = get_offset_with_default(args.get("after"), -1) + 1
+        end = None if first is None else slice_start + first + 1
+        page = list(iterable[slice_start:end])
+
+        result = connection_from_array_slice(
+            page,
+            args,
+            slice_start=slice_start,
+            array_length=slice_start + len(page),
+            array_slice_length=len(page),
+            connection_type=partial(connection_adapter, connection),
+            edge_type=connection.Edge,
+            page_info_type=page_info_adapter,
+        )
+        result.iterable = iterable
+        result.length = slice_start + len(page)
+        return result
 
 
 # -------------------------
@@ -22,27 +93,57 @@ class CustomerNode(DjangoObjectType):
     class Meta:
         model = Customer
         interfaces = (graphene.relay.Node,)
-        fields = ("id", "name", "email", "phone", "created_at")
+        connection_class = CountableConnection
+        fields = (
+            "id", "name", "email", "phone", "created_at",
+            "order_count", "lifetime_value", "last_order_date",
+        )
 
 
 class ProductNode(DjangoObjectType):
     class Meta:
         model = Product
         interfaces = (graphene.relay.Node,)
-        fields = ("id", "name", "price", "stock")
+        connection_class = CountableConnection
+        fields = ("id", "name", "price", "stock", "sku")
+
+    @classmethod
+    def get_node(cls, info, id):
+        # name/price come from the catalog cache; stock is deferred and read only if selected.
+        try:
+            snapshot = catalog.get(id)
+        except (TypeError, ValueError):
+            return None
+        return snapshot.to_product() if snapshot else None
 
 
 class OrderNode(DjangoObjectType):
     # Convenience: allow querying `product { ... }` (first product)
     product = graphene.Field(ProductNode)
+    is_archived = graphene.Boolean()
 
     class Meta:
         model = Order
         interfaces = (graphene.relay.Node,)
+        connection_class = CountableConnection
         fields = ("id", "customer", "products", "total_amount", "order_date")
 
+    def resolve_products(self, info, **kwargs):
+        # Rows from allOrders(includeArchived: true) may be archived orders,
+        # whose product links live in the archive through table (batch-loaded
+        # per page by crm.archive.prefetch_page).
+        if getattr(self, "is_archived", False):
+            products = getattr(self, "archived_products", None)
+            return Product.objects.filter(archived_orders=self.pk) if products is None else products
+        return self.products.all()
+
     def resolve_product(self, info):
-        return self.products.first()
+        # Lowest id, like .first(), but served from the prefetched products.
+        products = list(OrderNode.resolve_products(self, info))
+        return min(products, key=lambda p: p.pk) if products else None
+
+    def resolve_is_archived(self, info):
+        return bool(getattr(self, "is_archived", False))
 
 
 # -------------------------
@@ -51,13 +152,16 @@ class OrderNode(DjangoObjectType):
 class CustomerType(DjangoObjectType):
     class Meta:
         model = Customer
-        fields = ("id", "name", "email", "phone", "created_at")
+        fields = (
+            "id", "name", "email", "phone", "created_at",
+            "order_count", "lifetime_value", "last_order_date",
+        )
 
 
 class ProductType(DjangoObjectType):
     class Meta:
         model = Product
-        fields = ("id", "name", "price", "stock")
+        fields = ("id", "name", "price", "stock", "sku")
 
 
 class OrderType(DjangoObjectType):
@@ -71,33 +175,55 @@ class OrderType(DjangoObjectType):
         return self.products.first()
 
 
+class OrderConnectionField(CountableConnectionField):
+    """allOrders: with includeArchived, UNIONs archived orders matching the same filters."""
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        qs = super().resolve_queryset(connection, iterable, info, args, filtering_args, filterset_class)
+        if not args.get("include_archived"):
+            return qs
+        from crm.archive import with_archived
+
+        return with_archived(qs, {k: v for k, v in args.items() if k in filtering_args})
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        include_archived = args.get("include_archived")
+        result = super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+        if include_archived:
+            from crm.archive import prefetch_page
+
+            prefetch_page([edge.node for edge in result.edges])
+        return result
+
+
 # -------------------------
 # Query (Task 3 filtering)
 # -------------------------
 class Query(graphene.ObjectType):
     hello = graphene.String(default_value="Hello, GraphQL!")
+    node = graphene.relay.Node.Field()
 
-    all_customers = DjangoFilterConnectionField(
+    all_customers = CountableConnectionField(
         CustomerNode,
         filterset_class=CustomerFilter,
-        order_by=graphene.String(),
     )
-    all_products = DjangoFilterConnectionField(
+    all_products = CountableConnectionField(
         ProductNode,
         filterset_class=ProductFilter,
         order_by=graphene.String(),
     )
-    all_orders = DjangoFilterConnectionField(
+    all_orders = OrderConnectionField(
         OrderNode,
         filterset_class=OrderFilter,
         order_by=graphene.String(),
+        include_archived=graphene.Boolean(),
     )
 
-    def resolve_all_customers(self, info, order_by=None, **kwargs):
-        qs = Customer.objects.all()
-        if order_by:
-            qs = qs.order_by(order_by)
-        return qs
+    def resolve_all_customers(self, info, **kwargs):
+        # Ordering is applied by CustomerFilter.order_by
+        return Customer.objects.all()
 
     def resolve_all_products(self, info, order_by=None, **kwargs):
         qs = Product.objects.all()
@@ -125,6 +251,7 @@ class ProductInput(graphene.InputObjectType):
     name = graphene.String(required=True)
     price = graphene.Decimal(required=True)
     stock = graphene.Int(required=False)
+    sku = graphene.String(required=False)
 
 
 class OrderInput(graphene.InputObjectType):
@@ -161,6 +288,51 @@ def to_decimal(value) -> Decimal:
         raise GraphQLError("Invalid price value.")
 
 
+PRODUCT_NAME_MAX = Product._meta.get_field("name").max_length
+PRODUCT_SKU_MAX = Product._meta.get_field("sku").max_length
+PRICE_MAX_DIGITS = Product._meta.get_field("price").max_digits
+PRICE_DECIMAL_PLACES = Product._meta.get_field("price").decimal_places
+PRICE_INTEGER_DIGITS = PRICE_MAX_DIGITS - PRICE_DECIMAL_PLACES
+PRICE_QUANTUM = Decimal(1).scaleb(-PRICE_DECIMAL_PLACES)
+
+
+def clean_product_input(data) -> Tuple[str, Decimal, Optional[int], Optional[str]]:
+    """
+    CreateProduct's rules: positive price that fits the price column,
+    non-negative integer stock.
+    Returns (name, price, stock, sku); price is quantized to the column's
+    decimal places, stock is None when not given.
+    """
+    name = (data.get("name") or "").strip()
+    if not name:
+        raise GraphQLError("Name is required.")
+    if len(name) > PRODUCT_NAME_MAX:
+        raise GraphQLError(f"Name must be at most {PRODUCT_NAME_MAX} characters.")
+    price = to_decimal(data.get("price"))
+    if not price.is_finite() or price <= 0:
+        raise GraphQLError("Price must be positive.")
+    # Values wider than the column would be stored anyway by SQLite and then
+    # break every read of the table. Checked after rounding, which can carry.
+    if price.adjusted() < PRICE_INTEGER_DIGITS:
+        price = price.quantize(PRICE_QUANTUM)
+    if price.adjusted() >= PRICE_INTEGER_DIGITS:
+        raise GraphQLError(f"Price must have at most {PRICE_INTEGER_DIGITS} digits before the decimal point.")
+    if price <= 0:
+        raise GraphQLError("Price must be positive.")
+    stock = data.get("stock")
+    if stock is not None:
+        try:
+            stock = int(stock)
+        except (TypeError, ValueError):
+            raise GraphQLError("Stock must be an integer.")
+        if stock < 0:
+            raise GraphQLError("Stock must be non-negative.")
+    sku = (data.get("sku") or "").strip() or None
+    if sku and len(sku) > PRODUCT_SKU_MAX:
+        raise GraphQLError(f"SKU must be at most {PRODUCT_SKU_MAX} characters.")
+    return name, price, stock, sku
+
+
 # -------------------------
 # Mutations (Task 2 + Task 3)
 # -------------------------
@@ -226,22 +398,47 @@ class CreateProduct(graphene.Mutation):
     product = graphene.Field(ProductType)
 
     def mutate(self, info, input):
-        name = input.get("name")
-        price = to_decimal(input.get("price"))
-        stock = input.get("stock", 0)
-
-        if price <= 0:
-            raise GraphQLError("Price must be positive.")
-        if stock is None:
-            stock = 0
-        if int(stock) < 0:
-            raise GraphQLError("Stock must be non-negative.")
+        name, price, stock, sku = clean_product_input(input)
 
-        product = Product(name=name, price=price, stock=int(stock))
-        product.save()
+        product = Product(name=name, price=price, stock=stock or 0, sku=sku)
+        try:
+            with transaction.atomic():
+                product.save()
+        except IntegrityError:
+            raise GraphQLError("SKU already exists.")
         return CreateProduct(product=product)
 
 
+class BulkUpsertProducts(graphene.Mutation):
+    """
+    Create or update products keyed by sku (or by name for rows without one).
+    Rows are validated in memory, existing products are loaded in one query,
+    and only changed fields are written: new rows with bulk_create, changed
+    rows with bulk_update, grouped by the set of fields that changed.
+    """
+
+    class Arguments:
+        input = graphene.List(ProductInput, required=True)
+
+    products = graphene.List(ProductType)
+    created = graphene.Int()
+    updated = graphene.Int()
+    unchanged = graphene.Int()
+    errors = graphene.List(graphene.String)
+
+    def mutate(self, info, input):
+        from crm.upsert import upsert_products
+
+        result = upsert_products(input)
+        return BulkUpsertProducts(
+            products=result.created + result.updated,
+            created=len(result.created),
+            updated=len(result.updated),
+            unchanged=result.unchanged,
+            errors=[f"Record {idx}: {message}" for idx, message in result.errors],
+        )
+
+
 class CreateOrder(graphene.Mutation):
     class Arguments:
         input = OrderInput(required=True)
@@ -261,16 +458,24 @@ class CreateOrder(graphene.Mutation):
         except Customer.DoesNotExist:
             raise GraphQLError("Invalid customer ID.")
 
-        products = list(Product.objects.filter(pk__in=product_ids))
-        if len(products) != len(set(product_ids)):
+        try:
+            wanted = {int(pk) for pk in product_ids}
+        except (TypeError, ValueError):
+            raise GraphQLError("Invalid product ID.")
+        # Prices come from the catalog cache; only cache misses hit the DB.
+        products = catalog.get_many(wanted)
+        if len(products) != len(wanted):
             raise GraphQLError("Invalid product ID.")
 
-        total = sum((p.price for p in products), Decimal("0.00"))
+        total = sum((p.price for p in products.values()), Decimal("0.00"))
 
         with transaction.atomic():
-            order = Order(customer=customer, total_amount=total, order_date=order_date)
-            order.save()
-            order.products.set(products)
+            order = Order.objects.create(customer=customer, total_amount=total, order_date=order_date)
+            # A new order has no links yet, so skip the related manager's existence
+            # check; bulk_create doesn't send m2m_changed, so record the links here.
+            Through = Order.products.through
+            Through.objects.bulk_create([Through(order_id=order.pk, product_id=pk) for pk in sorted(wanted)])
+            changefeed.record_order(order, "update", product_ids=wanted)
 
         return CreateOrder(order=order)
 
@@ -282,12 +487,12 @@ class UpdateLowStockProducts(graphene.Mutation):
     @staticmethod
     def mutate(root, info):
         updated = []
-        low_qs = Product.objects.filter(stock__lt=10)
+        low_qs = Product.objects.filter(stock__lt=LOW_STOCK_THRESHOLD)
 
         with transaction.atomic():
             for p in low_qs:
-                p.stock = int(p.stock) + 10
-                p.save()
+                p.stock = int(p.stock) + RESTOCK_AMOUNT
+                p.save(update_fields=["stock"])
                 updated.append(p)
 
         return UpdateLowStockProducts(products=updated, message="Low stock products updated successfully.")
@@ -297,5 +502,6 @@ class Mutation(graphene.ObjectType):
     create_customer = CreateCustomer.Field()
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
+    bulk_upsert_products = BulkUpsertProducts.Field()
     create_order = CreateOrder.Field()
     update_low_stock_products = UpdateLowStockProducts.Field()
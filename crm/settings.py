@@ -26,4 +26,8 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'crm.tasks.generate_crm_report',
         'schedule': crontab(day_of_week='mon', hour=6, minute=0),
     },
+    'archive-old-orders': {
+        'task': 'crm.tasks.archive_old_orders',
+        'schedule': crontab(hour=3, minute=0),
+    },
 }
@@ -0,0 +1,104 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from crm import catalog, changefeed, restock, stats
+from crm.models import Customer, Order, Product
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_customer(sender, instance, raw=False, update_fields=None, **kwargs):
+    # An order moving to another customer must refresh the old one too.
+    instance._stats_previous_customer_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {"customer", "customer_id"} & set(update_fields):
+        return
+    previous = Order.objects.filter(pk=instance.pk).values_list("customer_id", flat=True).first()
+    if previous != instance.customer_id:
+        instance._stats_previous_customer_id = previous
+
+
+@receiver(post_save, sender=Order)
+def update_stats_on_order_save(sender, instance, created, raw=False, **kwargs):
+    # Runs inside the caller's transaction (e.g. CreateOrder's atomic block).
+    if raw:
+        return
+    if created:
+        stats.record_new_order(instance)
+    else:
+        previous = getattr(instance, "_stats_previous_customer_id", None)
+        stats.refresh_customer_stats([instance.customer_id, previous])
+
+
+def _deleting_customers(origin) -> bool:
+    if isinstance(origin, QuerySet):
+        return origin.model is Customer
+    return isinstance(origin, Customer)
+
+
+@receiver(post_delete, sender=Order)
+def update_stats_on_order_delete(sender, instance, origin=None, **kwargs):
+    # Orders cascading from a customer delete: their customer is going away too.
+    if _deleting_customers(origin):
+        return
+    stats.refresh_customer_stats_on_commit([instance.customer_id])
+
+
+@receiver(post_save, sender=Product)
+def request_restock_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        restock.request_restock(instance)
+
+
+# -------------------------
+# Product catalog cache
+# -------------------------
+@receiver(post_save, sender=Product)
+def invalidate_catalog_on_product_save(sender, instance, update_fields=None, **kwargs):
+    # The catalog doesn't hold stock, so stock-only saves keep it valid.
+    if update_fields is None or set(update_fields) - {"stock"}:
+        catalog.invalidate()
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_on_product_delete(sender, instance, **kwargs):
+    catalog.invalidate()
+
+
+# -------------------------
+# Change feed
+# -------------------------
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+def record_change_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        changefeed.record(instance, "create" if created else "update")
+
+
+@receiver(post_save, sender=Order)
+def record_order_change_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        # A brand-new order has no products yet; they arrive with the M2M event
+        # (or CreateOrder, which writes the links itself, records them).
+        changefeed.record_order(instance, "create" if created else "update", product_ids=[] if created else None)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def record_change_on_delete(sender, instance, **kwargs):
+    changefeed.record_deleted(instance)
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def record_order_products_change(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # product.orders.add(...) etc.: record each affected order.
+        pk_set = kwargs.get("pk_set") or ()
+        for order in Order.objects.filter(pk__in=pk_set):
+            changefeed.record_order(order, "update")
+    else:
+        changefeed.record_order(instance, "update")
@@ -0,0 +1,98 @@
+"""
+Denormalized per-customer activity stats (order_count, lifetime_value,
+last_order_date on Customer).
+
+- Single-row writes go through the Order signals in crm/signals.py. Deletes
+  refresh each affected customer once, when the transaction commits, and skip
+  customers that are being deleted themselves.
+- Bulk paths (bulk_create, QuerySet.update, raw deletes) must call
+  refresh_customer_stats() with the affected customer ids themselves.
+- `manage.py reconcile_customer_stats` recomputes everything from live and
+  archived orders.
+"""
+from decimal import Decimal
+from typing import Iterable, List
+
+from django.db.models import (
+    Count,
+    DateTimeField,
+    DecimalField,
+    F,
+    IntegerField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from crm.db import collect_on_commit
+from crm.models import ArchivedOrder, Customer, Order
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 500
+
+
+def chunked(ids: List[int], size: int = ID_CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def record_new_order(order: Order) -> None:
+    """Fold a freshly inserted order into its customer's stats with one UPDATE."""
+    order_date = Value(order.order_date, output_field=DateTimeField())
+    Customer.objects.filter(pk=order.customer_id).update(
+        order_count=F("order_count") + 1,
+        lifetime_value=F("lifetime_value") + Value(order.total_amount, output_field=DecimalField()),
+        last_order_date=Greatest(Coalesce("last_order_date", order_date), order_date),
+    )
+
+    # Mirror the update on an already-loaded customer so callers returning it see fresh stats.
+    if Order.customer.is_cached(order):
+        customer = order.customer
+        customer.order_count += 1
+        customer.lifetime_value += order.total_amount
+        if customer.last_order_date is None or order.order_date > customer.last_order_date:
+            customer.last_order_date = order.order_date
+
+
+def _per_customer(model, aggregate, output_field):
+    rows = model.objects.filter(customer=OuterRef("pk")).order_by().values("customer")
+    return Subquery(rows.annotate(v=aggregate).values("v"), output_field=output_field)
+
+
+def refresh_customer_stats(customer_ids: Iterable[int]) -> int:
+    """
+    Recompute stats from live and archived orders for the given customers.
+    Returns the number of customer rows updated.
+    """
+    ids = sorted({int(pk) for pk in customer_ids if pk is not None})
+    money = DecimalField(max_digits=14, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+
+    updated = 0
+    for chunk in chunked(ids):
+        live_date = _per_customer(Order, Max("order_date"), DateTimeField())
+        archived_date = _per_customer(ArchivedOrder, Max("order_date"), DateTimeField())
+        updated += Customer.objects.filter(pk__in=chunk).update(
+            order_count=(
+                Coalesce(_per_customer(Order, Count("pk"), IntegerField()), Value(0))
+                + Coalesce(_per_customer(ArchivedOrder, Count("pk"), IntegerField()), Value(0))
+            ),
+            lifetime_value=(
+                Coalesce(_per_customer(Order, Sum("total_amount"), money), zero)
+                + Coalesce(_per_customer(ArchivedOrder, Sum("total_amount"), money), zero)
+            ),
+            # GREATEST/MAX() is NULL if either side is; fall back to the other side.
+            last_order_date=Greatest(
+                Coalesce(live_date, archived_date),
+                Coalesce(archived_date, live_date),
+            ),
+        )
+    return updated
+
+
+def refresh_customer_stats_on_commit(customer_ids: Iterable[int]) -> None:
+    """Queue customers for one refresh_customer_stats() when the transaction commits."""
+    collect_on_commit("crm:stats:refresh", customer_ids, refresh_customer_stats)
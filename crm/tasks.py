@@ -46,6 +46,30 @@ def generate_crm_report():
     return "Report generated"
 
 
+@shared_task(name="crm.tasks.process_restock_queue")
+def process_restock_queue(batch_size=500):
+    """
+    Drains the deduplicated restock queue filled by product writes
+    (see crm/restock.py). Logs to /tmp/low_stock_updates_log.txt
+    """
+    from crm.restock import process_queue
+
+    restocked = process_queue(batch_size=batch_size)
+    return f"Restocked {restocked} products"
+
+
+@shared_task(name="crm.tasks.archive_old_orders")
+def archive_old_orders(batch_size=1000):
+    """
+    Moves orders older than ORDER_ARCHIVE_AFTER_DAYS into the archive tables
+    (see crm/archive.py).
+    """
+    from crm.archive import archive_orders
+
+    archived = archive_orders(batch_size=batch_size)
+    return f"Archived {archived} orders"
+
+
 # Alias for strict checkers
 def generatecrmreport():
     return generate_crm_report()
@@ -0,0 +1,152 @@
+"""
+Bulk product upsert (bulkUpsertProducts).
+
+- Rows are validated in memory with CreateProduct's rules; bad rows become
+  per-row errors and don't stop the rest.
+- Rows are keyed by sku, or by name when they have none. A sku that isn't
+  known yet is attached to the one product with that name and no sku, so a
+  catalog can start sending skus without duplicating its products.
+- Existing products are read in one query, then new rows go through
+  bulk_create and changed rows through bulk_update, grouped by the set of
+  fields that actually changed. Unchanged rows cost nothing.
+- bulk_* skip signals, so the change feed, restock queue and catalog cache
+  are updated here.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from graphql import GraphQLError
+
+from crm import catalog, changefeed
+from crm.models import LOW_STOCK_THRESHOLD, Product
+from crm.restock import request_restock_bulk
+from crm.schema import clean_product_input
+from crm.stats import ID_CHUNK_SIZE
+
+DEFAULT_BATCH_SIZE = 1000
+COLUMNS = ("pk", "name", "price", "stock", "sku")
+
+
+@dataclass
+class UpsertResult:
+    created: List[Product] = field(default_factory=list)
+    updated: List[Product] = field(default_factory=list)
+    unchanged: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class _Row:
+    index: int
+    name: str
+    price: Decimal
+    stock: Optional[int]
+    sku: Optional[str]
+
+
+def _clean(rows: Iterable[Mapping], result: UpsertResult) -> List[_Row]:
+    cleaned, seen = [], set()
+    for index, data in enumerate(rows):
+        try:
+            name, price, stock, sku = clean_product_input(data)
+        except GraphQLError as e:
+            result.errors.append((index, e.message))
+            continue
+        key = ("sku", sku) if sku else ("name", name)
+        if key in seen:
+            result.errors.append((index, f"Duplicate {key[0]} {key[1]!r} in input."))
+            continue
+        seen.add(key)
+        cleaned.append(_Row(index, name, price, stock, sku))
+    return cleaned
+
+
+def _load_existing(rows: List[_Row]):
+    """One query: by key for small batches, the whole catalog for catalog-sized syncs."""
+    skus = {r.sku for r in rows if r.sku}
+    names = {r.name for r in rows}
+    qs = Product.objects.all()
+    if len(skus) + len(names) <= ID_CHUNK_SIZE:
+        qs = qs.filter(Q(sku__in=skus) | Q(name__in=names))
+
+    by_sku: Dict[str, tuple] = {}
+    by_name: Dict[str, List[tuple]] = defaultdict(list)
+    for values in qs.values_list(*COLUMNS).iterator(chunk_size=5000):
+        if values[4]:
+            by_sku[values[4]] = values
+        by_name[values[1]].append(values)
+    return by_sku, by_name
+
+
+def upsert_products(rows: Iterable[Mapping], batch_size: int = DEFAULT_BATCH_SIZE) -> UpsertResult:
+    result = UpsertResult()
+    cleaned = _clean(rows, result)
+    if not cleaned:
+        return result
+    by_sku, by_name = _load_existing(cleaned)
+
+    to_update: Dict[Tuple[str, ...], List[Product]] = defaultdict(list)
+    claimed = set()
+    for row in cleaned:
+        if row.sku:
+            match = by_sku.get(row.sku)
+            if match is None:
+                unkeyed = [v for v in by_name.get(row.name, ()) if not v[4] and v[0] not in claimed]
+                match = unkeyed[0] if len(unkeyed) == 1 else None
+        else:
+            matches = by_name.get(row.name, ())
+            if len(matches) > 1:
+                result.errors.append((row.index, f"{len(matches)} products are named {row.name!r}; give a sku."))
+                continue
+            match = matches[0] if matches else None
+
+        if match is None:
+            result.created.append(Product(name=row.name, price=row.price, stock=row.stock or 0, sku=row.sku))
+            continue
+        if match[0] in claimed:
+            result.errors.append((row.index, "Matches the same product as another row."))
+            continue
+        claimed.add(match[0])
+
+        product = Product(**dict(zip(("id", "name", "price", "stock", "sku"), match)))
+        changed = []
+        if product.name != row.name:
+            product.name = row.name
+            changed.append("name")
+        if product.price != row.price:
+            product.price = row.price
+            changed.append("price")
+        if row.stock is not None and product.stock != row.stock:
+            product.stock = row.stock
+            changed.append("stock")
+        if row.sku and product.sku != row.sku:
+            product.sku = row.sku
+            changed.append("sku")
+        if not changed:
+            result.unchanged += 1
+            continue
+        to_update[tuple(changed)].append(product)
+        result.updated.append(product)
+
+    try:
+        with transaction.atomic():
+            Product.objects.bulk_create(result.created, batch_size=batch_size)
+            for fields, products in to_update.items():
+                Product.objects.bulk_update(products, fields, batch_size=batch_size)
+
+            changefeed.record_objects(result.created, "create")
+            changefeed.record_objects(result.updated, "update")
+            request_restock_bulk(
+                p.pk for p in result.created + result.updated if p.stock < LOW_STOCK_THRESHOLD
+            )
+            if any(set(fields) & {"name", "price"} for fields in to_update):
+                catalog.invalidate()
+    except IntegrityError:
+        # Only possible if another writer claimed one of these skus concurrently.
+        raise GraphQLError("SKU conflict with a concurrent write; retry the upsert.")
+    result.errors.sort()
+    return result
@@ -1,3 +1,133 @@
-from django.shortcuts import render
+import time
 
-# Create your views here.
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from graphene_django.views import GraphQLView
+from graphql.execution import ExecutionContext
+
+from crm import admission, changefeed, db, health
+from crm.export import CONTENT_TYPES, DEFAULT_CHUNK_SIZE, stream_export
+
+
+class RoutedExecutionContext(ExecutionContext):
+    """Records the operation type once per request, for crm.db.ReadWriteRouter."""
+
+    def execute_operation(self, operation, root_value):
+        db.set_operation(operation.operation.value)
+        return super().execute_operation(operation, root_value)
+
+
+class CRMGraphQLView(GraphQLView):
+    execution_context_class = RoutedExecutionContext
+
+    def dispatch(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        # None until an operation executes; GraphiQL page loads aren't recorded.
+        request.graphql_failed = None
+        response = super().dispatch(request, *args, **kwargs)
+        if request.graphql_failed is not None or response.status_code >= 400:
+            ok = response.status_code < 400 and not request.graphql_failed
+            health.get_stats().record(time.perf_counter() - started, ok)
+        return response
+
+    def execute_graphql_request(self, request, *args, **kwargs):
+        try:
+            result = super().execute_graphql_request(request, *args, **kwargs)
+            if result is not None:
+                request.graphql_failed = bool(request.graphql_failed or result.errors)
+            return result
+        finally:
+            # Set by RoutedExecutionContext; don't let it leak into the next
+            # request served by this thread.
+            db.set_operation(None)
+
+
+# Query params consumed by the export view; everything else is a filter.
+EXPORT_OPTIONS = ("format", "gzip", "chunk_size")
+
+
+@require_GET
+def export_view(request, entity):
+    """
+    GET /export/<orders|customers|products>?format=ndjson|csv&gzip=1&orderDateGte=...
+
+    Filters accept the same arguments as the GraphQL filtersets.
+    """
+    fmt = request.GET.get("format", "ndjson")
+    compress = request.GET.get("gzip", "").lower() in ("1", "true", "yes")
+    params = {k: v for k, v in request.GET.items() if k not in EXPORT_OPTIONS}
+
+    try:
+        chunk_size = int(request.GET.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        body = stream_export(entity, params, fmt=fmt, compress=compress, chunk_size=max(1, chunk_size))
+    except ValueError:
+        return HttpResponseBadRequest("chunk_size must be an integer.")
+    except ValidationError as e:
+        return HttpResponseBadRequest("; ".join(e.messages))
+
+    filename = f"{entity}.{fmt}" + (".gz" if compress else "")
+    response = StreamingHttpResponse(
+        body,
+        content_type="application/gzip" if compress else CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_GET
+def change_feed_view(request):
+    """
+    GET /changes?since=<seq>&entities=order,customer&batch_size=500
+
+    Server-Sent Events stream of ChangeLog entries after `since` (or the
+    Last-Event-ID header on reconnect). Each event's id is its seq.
+    """
+    try:
+        since = int(request.headers.get("Last-Event-ID") or request.GET.get("since", 0))
+        batch_size = int(request.GET.get("batch_size", changefeed.DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return HttpResponseBadRequest("since and batch_size must be integers.")
+    batch_size = min(max(1, batch_size), changefeed.MAX_BATCH_SIZE)
+
+    entities = [e for e in request.GET.get("entities", "").split(",") if e]
+    unknown = set(entities) - set(changefeed.ENTITIES.values())
+    if unknown:
+        return HttpResponseBadRequest(f"Unknown entities: {', '.join(sorted(unknown))}.")
+
+    if isinstance(request, ASGIRequest):
+        body = changefeed.astream(since, entities, batch_size)
+    else:
+        body = changefeed.stream(since, entities, batch_size)
+
+    response = StreamingHttpResponse(body, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+def admission_stats_view(request):
+    """GET /graphql/admission: queue depth, wait times and rejections for this process."""
+    return JsonResponse(admission.get_controller().stats())
+
+
+@require_GET
+def health_view(request):
+    """
+    GET /health
+
+    Readiness: 200 if every database can read django_migrations, else 503. Also
+    reports this process's rolling GraphQL latency percentiles and error rate.
+    """
+    report = health.check()
+    admission_stats = admission.get_controller().stats()
+    report["admission"] = {
+        "in_flight": admission_stats["in_flight"],
+        "queue_depth": admission_stats["queue_depth"],
+        "rejected": admission_stats["rejected"],
+    }
+    response = JsonResponse(report, status=200 if report["status"] == "ok" else 503)
+    response["Cache-Control"] = "no-store"
+    return response